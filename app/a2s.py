@@ -0,0 +1,252 @@
+import bz2
+import struct
+import asyncio
+
+from utils import Log, LogLevel
+
+A2S_SINGLE_PACKET   = -1
+A2S_SPLIT_PACKET    = -2
+
+A2S_INFO_REQUEST    = b'\xFF\xFF\xFF\xFFTSource Engine Query\x00'
+A2S_PLAYER_REQUEST  = b'\xFF\xFF\xFF\xFFU'
+A2S_NO_CHALLENGE    = b'\xFF\xFF\xFF\xFF'
+
+A2S_INFO_RESPONSE       = 0x49
+A2S_PLAYER_RESPONSE     = 0x44
+A2S_CHALLENGE_RESPONSE  = 0x41
+
+class A2SError(RuntimeError):
+    pass
+
+class A2SReader:
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def remaining(self):
+        return len(self.data) - self.offset
+
+    def unpack(self, fmt):
+        size = struct.calcsize(fmt)
+        if self.remaining() < size:
+            raise A2SError("Truncated A2S response")
+
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += size
+        return values[0] if len(values) == 1 else values
+
+    def byte(self):
+        return self.unpack("<B")
+
+    def short(self):
+        return self.unpack("<h")
+
+    def long(self):
+        return self.unpack("<l")
+
+    def longlong(self):
+        return self.unpack("<Q")
+
+    def float(self):
+        return self.unpack("<f")
+
+    def char(self):
+        return chr(self.byte())
+
+    def string(self):
+        end = self.data.find(b'\x00', self.offset)
+        if end < 0:
+            raise A2SError("Unterminated string in A2S response")
+
+        value = self.data[self.offset:end].decode("utf8", errors="replace")
+        self.offset = end + 1
+        return value
+
+def parse_info(payload: bytes):
+    reader = A2SReader(payload)
+
+    info = {
+        "_type":        "source",
+        "protocol":     reader.byte(),
+        "name":         reader.string(),
+        "map":          reader.string(),
+        "folder":       reader.string(),
+        "game":         reader.string(),
+        "app_id":       reader.short() & 0xFFFF,
+        "players":      reader.byte(),
+        "max_players":  reader.byte(),
+        "bots":         reader.byte(),
+        "server_type":  reader.char(),
+        "environment":  reader.char(),
+        "visibility":   reader.byte(),
+        "vac":          reader.byte(),
+        "version":      reader.string(),
+    }
+
+    if not reader.remaining():
+        return info
+
+    edf = info["edf"] = reader.byte()
+
+    if edf & 0x80:
+        info["port"] = reader.short() & 0xFFFF
+    if edf & 0x10:
+        info["steam_id"] = reader.longlong()
+    if edf & 0x40:
+        info["sourcetv_port"] = reader.short() & 0xFFFF
+        info["sourcetv_name"] = reader.string()
+    if edf & 0x20:
+        info["keywords"] = reader.string()
+    if edf & 0x01:
+        info["game_id"] = reader.longlong()
+
+    return info
+
+def parse_players(payload: bytes):
+    reader = A2SReader(payload)
+
+    count = reader.byte()
+    players = []
+
+    for _ in range(count):
+        if not reader.remaining():
+            break
+
+        players.append({
+            "index":    reader.byte(),
+            "name":     reader.string(),
+            "score":    reader.long(),
+            "duration": reader.float(),
+        })
+
+    return players
+
+class A2SProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self):
+        self.transport = None
+        self.__queue = asyncio.Queue()
+        self.__fragments = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            packet = self.__reassemble(data)
+        except (A2SError, struct.error, OSError, ValueError) as e:
+            self.__queue.put_nowait(A2SError(f"Malformed A2S packet: {e}"))
+            return
+
+        if packet is not None:
+            self.__queue.put_nowait(packet)
+
+    def error_received(self, exc):
+        self.__queue.put_nowait(exc)
+
+    def connection_lost(self, exc):
+        if exc:
+            self.__queue.put_nowait(exc)
+
+    def __reassemble(self, data):
+        reader = A2SReader(data)
+        header = reader.long()
+
+        if header == A2S_SINGLE_PACKET:
+            return data[reader.offset:]
+
+        if header != A2S_SPLIT_PACKET:
+            raise A2SError(f"Unknown packet header {header}")
+
+        packet_id = reader.long()
+        total = reader.byte()
+        number = reader.byte()
+        reader.short() # max packet size, unused
+
+        compressed = bool(packet_id & 0x80000000)
+        if compressed and number == 0:
+            reader.long() # decompressed size
+            reader.long() # crc32
+
+        fragments = self.__fragments.setdefault(packet_id, {})
+        fragments[number] = data[reader.offset:]
+
+        if len(fragments) < total:
+            return None
+
+        del self.__fragments[packet_id]
+        payload = b''.join(fragments[i] for i in range(total))
+
+        if compressed:
+            payload = bz2.decompress(payload)
+
+        reader = A2SReader(payload)
+        if reader.long() != A2S_SINGLE_PACKET:
+            raise A2SError("Invalid reassembled packet header")
+
+        return payload[reader.offset:]
+
+    async def recv(self):
+        packet = await self.__queue.get()
+        if isinstance(packet, Exception):
+            raise packet
+        return packet
+
+class A2SClient(Log):
+
+    def __init__(self, ip, port, timeout=3.0, retries=2):
+        self.addr = (ip, port)
+        self.timeout = timeout
+        self.retries = retries
+
+    async def __query(self, build_request, expected):
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(A2SProtocol, remote_addr=self.addr)
+
+        try:
+            challenge = None
+
+            # One extra round for the challenge handshake
+            for _ in range(3):
+                transport.sendto(build_request(challenge))
+                payload = await asyncio.wait_for(protocol.recv(), self.timeout)
+
+                kind = payload[0] if payload else None
+
+                if kind == A2S_CHALLENGE_RESPONSE:
+                    challenge = payload[1:5]
+                    continue
+
+                if kind != expected:
+                    raise A2SError(f"Unexpected A2S response type {kind}")
+
+                return payload[1:]
+
+            raise A2SError("Server keeps answering with challenges")
+        finally:
+            transport.close()
+
+    async def query(self, build_request, expected):
+        last_error = None
+
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.__query(build_request, expected)
+            except (asyncio.TimeoutError, OSError, A2SError) as e:
+                last_error = e
+                self.log(f"A2S query to {self.addr[0]}:{self.addr[1]} failed (attempt {attempt + 1}/{self.retries + 1}): {e!r}", LogLevel.WARN)
+
+        raise A2SError(f"A2S query to {self.addr[0]}:{self.addr[1]} failed: {last_error!r}")
+
+    async def info(self):
+        def build(challenge):
+            return A2S_INFO_REQUEST + (challenge or b'')
+
+        return parse_info(await self.query(build, A2S_INFO_RESPONSE))
+
+    async def players(self):
+        def build(challenge):
+            return A2S_PLAYER_REQUEST + (challenge or A2S_NO_CHALLENGE)
+
+        return parse_players(await self.query(build, A2S_PLAYER_RESPONSE))
@@ -3,9 +3,9 @@ import json
 import discord
 from discord.ext import commands
 
-from utils import Log, LogLevel
+from utils import Log, LogLevel, JobWorker, configure_logging
 from .bot import StatusBot
-from .server import Server
+from .server import Server, ServerFleet
 from db import Database
 
 class AppModule(Log):
@@ -30,6 +30,10 @@ class AppModule(Log):
     @property
     def settings(self):
         return self.app.settings
+
+    @property
+    def worker(self):
+        return self.app.worker
     
     def _check_settings_exist(self, p):
         return self.app._check_settings_exist(p)
@@ -40,9 +44,15 @@ class App(Log):
             with open("settings.json", 'r') as file:
                 self.settings = json.load(file)
 
-                self._check_settings_exist("ip")
-                self._check_settings_exist("displayed_ip")
-                self._check_settings_exist("base_port")
+                if "servers" in self.settings:
+                    for server in self.settings["servers"]:
+                        for p in ("name", "ip", "base_port"):
+                            if not (p in server):
+                                raise RuntimeError(f"Missing setting {p} in servers entry of settings.json")
+                else:
+                    self._check_settings_exist("ip")
+                    self._check_settings_exist("displayed_ip")
+                    self._check_settings_exist("base_port")
 
                 self._check_settings_exist("db_ip")
                 self._check_settings_exist("db_port")
@@ -55,10 +65,12 @@ class App(Log):
 
                 self._check_settings_exist("token")
 
+                configure_logging(self.settings.get("log", {}))
+
         except FileNotFoundError:
             self.log("Can't find settings.json", LogLevel.FATAL)
             exit(1)
-        except RuntimeError as e:
+        except (RuntimeError, KeyError) as e:
             self.log(str(e), LogLevel.FATAL)
             exit(1)
 
@@ -66,14 +78,41 @@ class App(Log):
                            self.settings["db_port"], 
                            self.settings["db_user"], 
                            self.settings["db_pass"], 
-                           self.settings["db_db"])
-        self.srv = Server(self.settings["ip"], 
-                          self.settings["base_port"])
+                           self.settings["db_db"],
+                           self.settings.get("db_pool_size", 15))
+        try:
+            self.fleet = ServerFleet([self.__createServer(server) for server in self.__serverSettings()])
+        except RuntimeError as e:
+            self.log(str(e), LogLevel.FATAL)
+            exit(1)
+
+        self.srv = self.fleet.default
+        self.worker = JobWorker(self.settings.get("worker_processes", 2), self.settings.get("log", {}))
 
-        self.bot = StatusBot('!', self.srv, self.settings)
+        self.bot = StatusBot('!', self.fleet, self.settings)
         self.bot.add_listener(self.on_ready)
         self.modules = {}
 
+    def __serverSettings(self):
+        if "servers" in self.settings:
+            return self.settings["servers"]
+
+        return [{
+            "name": "main",
+            "ip": self.settings["ip"],
+            "displayed_ip": self.settings["displayed_ip"],
+            "base_port": self.settings["base_port"],
+        }]
+
+    def __createServer(self, server):
+        return Server(server["ip"],
+                      server["base_port"],
+                      server.get("query_timeout", self.settings.get("query_timeout", 3.0)),
+                      server.get("query_retries", self.settings.get("query_retries", 2)),
+                      server.get("snapshot_ttl", self.settings.get("snapshot_ttl", 10.0)),
+                      server["name"],
+                      server.get("displayed_ip", server["ip"]))
+
     def _check_settings_exist(self, p):
         if not (p in self.settings):
             raise RuntimeError(f"Missing setting {p} in settings.json")
@@ -94,4 +133,7 @@ class App(Log):
                 await self.bot.add_cog(inst)
 
     def run(self):
-        self.bot.run(self.settings["token"])
\ No newline at end of file
+        try:
+            self.bot.run(self.settings["token"])
+        finally:
+            self.worker.close()
\ No newline at end of file
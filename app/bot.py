@@ -1,12 +1,14 @@
 import json
+import time
 import random
-
-from functools import wraps
+import hashlib
 
 import discord
 from discord.ext import commands, tasks
 
-from .server import Server
+from .server import Server, ServerFleet
+from .scheduler import PollScheduler, PollState
+from .outbox import Outbox, ChannelContext
 
 from utils import Log, LogLevel, BotInternalException, get_file_extension
 
@@ -65,7 +67,7 @@ star_wars_statuses = [
 ]
 
 class StatusBot(commands.Bot, Log):
-    def __init__(self, command_prefix: str, srv: Server, settings):
+    def __init__(self, command_prefix: str, fleet: ServerFleet, settings):
         intents = discord.Intents.default()
         intents.guild_messages = True
         intents.dm_messages = True
@@ -73,13 +75,20 @@ class StatusBot(commands.Bot, Log):
         intents.message_content = True
         super().__init__(command_prefix, intents=intents)
 
-        self.__srv_restarting_stage = 0
-        self.__srv = srv
+        self.__fleet = fleet
+        self.__srv_restarting_stage = {srv.name: 0 for srv in fleet}
+        self.__srv_restarting_since = {}
+        self.__restart_timeout = settings.get("restart_timeout", 300)
+        self.__scheduler = PollScheduler(settings)
+        self.__status_heartbeat = settings.get("status_heartbeat", 300)
+        self.__status_messages = {}
+        self.__status_fingerprints = {}
+        self.status_edits_sent = 0
+        self.status_edits_skipped = 0
         self.__service_role_id = settings["service_role_id"]
         self.__channel_id = settings["channel_id"]
-        self.__displayed_ip = settings["displayed_ip"]
-        self.__port = settings["base_port"]
         self.__attachment_handlers = {}
+        self.outbox = Outbox()
 
         self.__channel = None
         self.__cache = {}
@@ -90,10 +99,17 @@ class StatusBot(commands.Bot, Log):
             with open("cache.json", 'r') as file:
                 self.__cache = json.load(file)
         except FileNotFoundError:
-            self.__cacheSet("status_message_id", 0)
+            self.__cacheSet("status_message_ids", {})
             self.__cacheSet("maintenance_mode", False)
             self.__cacheSave()  
 
+        # Migrate the single-server cache layout
+        if self.__cacheGet("status_message_ids") is None:
+            status_message_id = self.__cacheGet("status_message_id")
+            self.__cacheSet("status_message_ids", {self.__fleet.default.name: status_message_id} if status_message_id else {})
+            self.__cache.pop("status_message_id", None)
+            self.__cacheSave()
+
     def __cacheSave(self):
         with open("cache.json", 'w') as file:
             json.dump(self.__cache, file, indent=4)
@@ -107,6 +123,13 @@ class StatusBot(commands.Bot, Log):
     def __cacheSet(self, field, value):
         self.__cache[field] = value
 
+    def isMaintenanceMode(self):
+        return bool(self.__cacheGet("maintenance_mode"))
+
+    def channelContext(self, channel_id=None):
+        channel = self.get_channel(channel_id) if channel_id else self.__channel
+        return ChannelContext(channel) if channel else None
+
     def toggleMaintenanceMode(self):
         oldmode = self.__cacheGet("maintenance_mode")
         mode = not oldmode if oldmode else True
@@ -115,10 +138,23 @@ class StatusBot(commands.Bot, Log):
         self.update_status.restart()
         return mode
 
-    def setRebootState(self):
-        self.__srv_restarting_stage = 2
+    def setRebootState(self, name=None):
+        srv = self.__fleet.get(name) if name else self.__fleet.default
+        if srv is None:
+            raise RuntimeError(f"Unknown server {name}")
+
+        self.__srv_restarting_stage[srv.name] = 2
+        self.__srv_restarting_since[srv.name] = time.monotonic()
         self.update_status.restart()
 
+    def __expireRebootStates(self):
+        # A restart that never brings the server back falls back to the offline backoff
+        now = time.monotonic()
+        for name, stage in self.__srv_restarting_stage.items():
+            if stage > 0 and now - self.__srv_restarting_since.get(name, now) > self.__restart_timeout:
+                self.log(f"Server {name} did not come back within {self.__restart_timeout} s after a restart", LogLevel.WARN)
+                self.__srv_restarting_stage[name] = 0
+
     def setAttachmentExtHandler(self, ext: str, func):
         self.log(f"Register file extension handler: {ext} -> {func.__qualname__ }")
         self.__attachment_handlers[ext] = func
@@ -132,23 +168,14 @@ class StatusBot(commands.Bot, Log):
         return f"[{_server}][{_ch}] <{message.author}> -> {_msg} ({_att})"
 
     async def send(self, ctx: commands.Context, message: str, delete_after=None, ephemeral=True):
-        try:
-            if (ctx.prefix == '/'):
-                return await ctx.send(message, ephemeral=ephemeral)
-            
-            return await ctx.send(message, delete_after=delete_after)
-        except Exception as e:
-            self.log(str(e), LogLevel.ERR)
-
+        return await self.outbox.send(ctx, message, delete_after, ephemeral)
 
     async def edit(self, msg: discord.Message, message: str, delete_after=None):
-        try:
-            await msg.edit(content=message)
-            
-            if delete_after and not msg.flags.ephemeral:
-                await msg.delete(delay=delete_after)
-        except Exception as e:
-            self.log(str(e), LogLevel.ERR)
+        if msg is None:
+            self.log("Can't edit message that was never sent", LogLevel.ERR)
+            return None
+
+        return await self.outbox.edit(msg, message, delete_after)
     
     # [BOT] Events
     async def on_ready(self):
@@ -218,7 +245,7 @@ class StatusBot(commands.Bot, Log):
             pass
 
     # [BOT] Field former        
-    def formEmbed(self, former: str):
+    def formEmbed(self, former: str, srv: Server, serverInfo: dict = None, serverPlayers: list = None):
         title = "Unknown"
         color = discord.Color.pink()
         fields = []
@@ -228,28 +255,30 @@ class StatusBot(commands.Bot, Log):
         if (maintenance_mode):
             title = "Техническое обслуживание"
             color = discord.Color.dark_blue()
-            fields = self.getMaintenanceFields()
+            fields = self.getMaintenanceFields(srv)
 
         elif (former == "online"):
-            serverInfo = self.__srv.getInfo()
+            if serverInfo is None:
+                serverInfo = srv.getInfo()
 
-            serverPlayers = []
-            if (serverInfo["players"]):
-                serverPlayers = self.__srv.getPlayers()
+            if serverPlayers is None:
+                serverPlayers = []
+                if (serverInfo["players"]):
+                    serverPlayers = srv.getPlayers()
 
             title = serverInfo["name"]
             color = discord.Color.green()
-            fields = self.getOnlineFields(serverInfo, serverPlayers)
+            fields = self.getOnlineFields(srv, serverInfo, serverPlayers)
 
         elif (former == "offline"):
             title = "Требуется обслуживание"
             color = discord.Color.red()
-            fields = self.getOfflineFields()
+            fields = self.getOfflineFields(srv)
 
         elif (former == "rebooting"):
             title = "Сервер перезагружается"
             color = discord.Color.yellow()
-            fields = self.getRebootingFields()
+            fields = self.getRebootingFields(srv)
 
         else:
             raise RuntimeError(f"Unknown former {former}")
@@ -261,7 +290,7 @@ class StatusBot(commands.Bot, Log):
         return embed
 
 
-    def getOnlineFields(self, serverInfo: dict, serverPlayers: list):
+    def getOnlineFields(self, srv: Server, serverInfo: dict, serverPlayers: list):
         if (len(serverPlayers) > 0):
             if (len(serverPlayers) > 30):
                 players = "Невозможно отобразить всех игроков"
@@ -278,7 +307,7 @@ class StatusBot(commands.Bot, Log):
             },
             {
                 "name": "Адрес сервера",
-                "value": f"{self.__displayed_ip}:{serverInfo['port']}",
+                "value": f"{srv.displayed_ip}:{serverInfo.get('port', srv.base_port)}",
                 "inline": True
             },
             {
@@ -303,7 +332,7 @@ class StatusBot(commands.Bot, Log):
             },
         ]
 
-    def getOfflineFields(self):
+    def getOfflineFields(self, srv: Server):
         fields = [
             {
                 "name": "Статус",
@@ -312,7 +341,7 @@ class StatusBot(commands.Bot, Log):
             },
             {
                 "name": "Адрес сервера",
-                "value": f"{self.__displayed_ip}:{self.__port}",
+                "value": f"{srv.displayed_ip}:{srv.base_port}",
                 "inline": True
             }
         ]
@@ -326,7 +355,7 @@ class StatusBot(commands.Bot, Log):
 
         return fields
     
-    def getRebootingFields(self):
+    def getRebootingFields(self, srv: Server):
         return [
             {
                 "name": "Статус",
@@ -335,12 +364,12 @@ class StatusBot(commands.Bot, Log):
             },
             {
                 "name": "Адрес сервера",
-                "value": f"{self.__displayed_ip}:{self.__port}",
+                "value": f"{srv.displayed_ip}:{srv.base_port}",
                 "inline": True
             }
         ]
     
-    def getMaintenanceFields(self):
+    def getMaintenanceFields(self, srv: Server):
         return [
             {
                 "name": "Статус",
@@ -349,45 +378,85 @@ class StatusBot(commands.Bot, Log):
             },
             {
                 "name": "Адрес сервера",
-                "value": f"{self.__displayed_ip}:{self.__port}",
+                "value": f"{srv.displayed_ip}:{srv.base_port}",
                 "inline": True
             }
         ]
 
     # [BOT] Status update
+    def formServerEmbed(self, srv: Server, snapshot):
+        stage = self.__srv_restarting_stage[srv.name]
+
+        if (stage >= 2):
+            self.__srv_restarting_stage[srv.name] = 1
+            return self.formEmbed("rebooting", srv)
+
+        if (snapshot.online):
+            if (stage > 0):
+                self.__srv_restarting_stage[srv.name] = 0
+            return self.formEmbed("online", srv, snapshot.info, snapshot.players)
+        elif (stage == 0):
+            return self.formEmbed("offline", srv)
+
+        return self.formEmbed("rebooting", srv)
+
+    def getPollState(self, snapshots: dict):
+        if any(stage > 0 for stage in self.__srv_restarting_stage.values()):
+            return PollState.RESTARTING
+
+        if not any(snapshot.online for snapshot in snapshots.values()):
+            return PollState.OFFLINE
+
+        return PollState.ONLINE
+
+    def embedFingerprint(self, embed: discord.Embed):
+        data = embed.to_dict()
+        data.pop("timestamp", None)
+        return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf8")).hexdigest()
+
+    async def publishStatus(self, srv: Server, embed: discord.Embed):
+        fingerprint = self.embedFingerprint(embed)
+        last = self.__status_fingerprints.get(srv.name)
+        now = time.monotonic()
+
+        if last and last[0] == fingerprint and now - last[1] < self.__status_heartbeat:
+            self.status_edits_skipped += 1
+            return
+
+        status_message_ids = self.__cacheGet("status_message_ids")
+        message = self.__status_messages.get(srv.name)
+
+        if message is None and status_message_ids.get(srv.name, 0):
+            message = self.__channel.get_partial_message(status_message_ids[srv.name])
+
+        # A failed edit resolves to None, the status is then posted as a new message
+        if message is not None:
+            message = await self.outbox.edit(message, None, embed=embed)
+
+        if message is None:
+            message = await self.outbox.send(ChannelContext(self.__channel), None, embed=embed)
+            if message is None:
+                return
+
+            status_message_ids[srv.name] = message.id
+            self.__cacheSave()
+
+        self.__status_messages[srv.name] = message
+        self.__status_fingerprints[srv.name] = (fingerprint, now)
+        self.status_edits_sent += 1
+
     @tasks.loop(seconds=30)
     async def update_status(self):
-        status_message_id = self.__cacheGet("status_message_id")
+        self.__expireRebootStates()
+        restarting = any(stage > 0 for stage in self.__srv_restarting_stage.values())
+        snapshots = await self.__fleet.poll(0 if restarting else None)
 
-        async with self.__channel.typing():
-            embed = None
+        for srv in self.__fleet:
+            embed = self.formServerEmbed(srv, snapshots[srv.name])
+            await self.publishStatus(srv, embed)
 
-            if (self.__srv_restarting_stage >= 2):
-                self.__srv_restarting_stage = 1
-                embed = self.formEmbed("rebooting")
-            else:
-                if (self.__srv.ping()):
-                    if (self.__srv_restarting_stage > 0):
-                        self.__srv_restarting_stage = 0
-                    embed = self.formEmbed("online")
-                elif (self.__srv_restarting_stage == 0):
-                    embed = self.formEmbed("offline")
-                else:
-                    embed = self.formEmbed("rebooting")
-
-            try:
-                if (status_message_id == 0):
-                    raise RuntimeError("status_message_id == 0, send new")
-                
-                message = await self.__channel.fetch_message(status_message_id)
-                if (message):
-                    await message.edit(embed=embed)
-                else:
-                    raise RuntimeError("failed to fetch message, send new")
-            except Exception as e:
-                message = await self.__channel.send(embed=embed)
-                self.__cacheSet("status_message_id", message.id)
-                self.__cacheSave()
+        state = self.getPollState(snapshots)
+        self.update_status.change_interval(seconds=self.__scheduler.next_interval(state))
 
     @update_status.before_loop
     async def before_update_status(self):
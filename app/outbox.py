@@ -0,0 +1,184 @@
+import asyncio
+
+from collections import deque
+
+import discord
+from discord.ext import commands
+
+from utils import Log, LogLevel
+
+MESSAGE_LIMIT = 2000
+
+class SendOp:
+
+    def __init__(self, ctx: commands.Context, content: str, delete_after, ephemeral, embed: discord.Embed = None):
+        self.ctx = ctx
+        self.content = content
+        self.delete_after = delete_after
+        self.ephemeral = ephemeral
+        self.embed = embed
+        self.futures = [asyncio.get_running_loop().create_future()]
+
+    def can_merge(self, other):
+        return (isinstance(other, SendOp)
+                and other.ctx is self.ctx
+                and self.embed is None
+                and other.embed is None
+                and other.delete_after == self.delete_after
+                and other.ephemeral == self.ephemeral
+                and len(self.content) + len(other.content) + 1 <= MESSAGE_LIMIT)
+
+    def merge(self, other):
+        self.content = f"{self.content}\n{other.content}"
+        self.futures += other.futures
+
+class EditOp:
+
+    def __init__(self, msg: discord.Message, content: str, delete_after, embed: discord.Embed = None):
+        self.msg = msg
+        self.content = content
+        self.delete_after = delete_after
+        self.embed = embed
+        self.futures = [asyncio.get_running_loop().create_future()]
+
+class ChannelContext:
+    # Stands in for commands.Context when a background task posts to a channel
+
+    def __init__(self, channel: discord.abc.Messageable):
+        self.channel = channel
+        self.prefix = None
+
+    async def send(self, content, **kwargs):
+        kwargs.pop("ephemeral", None)
+        return await self.channel.send(content, **kwargs)
+
+class ChannelLane:
+
+    def __init__(self):
+        self.ops = deque()
+        self.pending_edits = {}
+        self.task = None
+
+class Outbox(Log):
+
+    def __init__(self, max_retries=3):
+        self.max_retries = max_retries
+        self.__lanes = {}
+
+        self.rate_limited = 0
+        self.sent = 0
+        self.edited = 0
+        self.merged_edits = 0
+        self.batched_sends = 0
+
+    @property
+    def depth(self):
+        return sum(len(lane.ops) for lane in self.__lanes.values())
+
+    def stats(self):
+        return {
+            "depth":            self.depth,
+            "channels":         len(self.__lanes),
+            "rate_limited":     self.rate_limited,
+            "sent":             self.sent,
+            "edited":           self.edited,
+            "merged_edits":     self.merged_edits,
+            "batched_sends":    self.batched_sends,
+        }
+
+    def __lane(self, channel_id):
+        lane = self.__lanes.get(channel_id)
+        if lane is None:
+            lane = self.__lanes[channel_id] = ChannelLane()
+        return lane
+
+    def __wake(self, channel_id, lane):
+        if lane.task is None or lane.task.done():
+            lane.task = asyncio.create_task(self.__worker(channel_id, lane))
+
+    def send(self, ctx: commands.Context, content: str, delete_after=None, ephemeral=True, embed: discord.Embed = None):
+        lane = self.__lane(ctx.channel.id)
+        op = SendOp(ctx, content, delete_after, ephemeral, embed)
+        lane.ops.append(op)
+        self.__wake(ctx.channel.id, lane)
+        return op.futures[0]
+
+    def edit(self, msg: discord.Message, content: str, delete_after=None, embed: discord.Embed = None):
+        lane = self.__lane(msg.channel.id)
+        op = lane.pending_edits.get(msg.id)
+
+        # Only the newest content of a not yet sent edit matters
+        if op is not None:
+            op.content = content
+            op.delete_after = delete_after
+            op.embed = embed
+            future = asyncio.get_running_loop().create_future()
+            op.futures.append(future)
+            self.merged_edits += 1
+            return future
+
+        op = EditOp(msg, content, delete_after, embed)
+        lane.ops.append(op)
+        lane.pending_edits[msg.id] = op
+        self.__wake(msg.channel.id, lane)
+        return op.futures[0]
+
+    async def __worker(self, channel_id, lane: ChannelLane):
+        while lane.ops:
+            op = lane.ops.popleft()
+
+            if isinstance(op, EditOp):
+                lane.pending_edits.pop(op.msg.id, None)
+            else:
+                while lane.ops and op.can_merge(lane.ops[0]):
+                    op.merge(lane.ops.popleft())
+                    self.batched_sends += 1
+
+            result = None
+            try:
+                result = await self.__with_retries(self.__execute, op)
+            except Exception as e:
+                self.log(str(e), LogLevel.ERR)
+
+            for future in op.futures:
+                if not future.done():
+                    future.set_result(result)
+
+        self.__lanes.pop(channel_id, None)
+
+    async def __with_retries(self, func, op):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await func(op)
+            except discord.RateLimited as e:
+                self.rate_limited += 1
+                retry_after = e.retry_after
+            except discord.HTTPException as e:
+                if e.status != 429:
+                    raise
+                self.rate_limited += 1
+                retry_after = 2 ** attempt
+
+            if attempt == self.max_retries:
+                raise RuntimeError(f"Giving up after {attempt + 1} rate limited attempts")
+
+            self.log(f"Rate limited, retrying in {retry_after:.1f} s", LogLevel.WARN)
+            await asyncio.sleep(retry_after)
+
+    async def __execute(self, op):
+        if isinstance(op, EditOp):
+            if op.embed is not None:
+                message = await op.msg.edit(embed=op.embed)
+            else:
+                message = await op.msg.edit(content=op.content)
+            self.edited += 1
+
+            if op.delete_after and not op.msg.flags.ephemeral:
+                await op.msg.delete(delay=op.delete_after)
+            return message
+
+        self.sent += 1
+        if (op.ctx.prefix == '/'):
+            return await op.ctx.send(op.content, ephemeral=op.ephemeral, embed=op.embed)
+
+        return await op.ctx.send(op.content, delete_after=op.delete_after, embed=op.embed)
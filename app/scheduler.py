@@ -0,0 +1,54 @@
+import random
+
+from enum import Enum
+
+from utils import Log
+
+class PollState(Enum):
+    ONLINE      = "online"
+    RESTARTING  = "restarting"
+    OFFLINE     = "offline"
+
+class PollScheduler(Log):
+
+    def __init__(self, settings: dict):
+        intervals = settings.get("status_intervals", {})
+
+        self.intervals = {
+            PollState.ONLINE:       float(intervals.get("online", 30)),
+            PollState.RESTARTING:   float(intervals.get("restarting", 5)),
+            PollState.OFFLINE:      float(intervals.get("offline", 30)),
+        }
+        self.offline_max = float(intervals.get("offline_max", 300))
+        self.jitter = float(settings.get("status_jitter", 0))
+
+        self.state = None
+        self.offline_streak = 0
+        self.base = self.intervals[PollState.ONLINE]
+        self.interval = self.base
+
+    def next_interval(self, state: PollState):
+        if state == PollState.OFFLINE:
+            # The streak stops growing once the backoff has reached its cap
+            if self.state != PollState.OFFLINE or self.base < self.offline_max:
+                self.offline_streak += 1
+        else:
+            self.offline_streak = 0
+
+        base = self.intervals[state]
+        if state == PollState.OFFLINE:
+            base = min(base * 2 ** (self.offline_streak - 1), self.offline_max)
+
+        interval = base
+        if self.jitter:
+            interval = max(1.0, base * (1 + random.uniform(-self.jitter, self.jitter)))
+            if state == PollState.OFFLINE:
+                interval = min(interval, self.offline_max)
+
+        if state != self.state or base != self.base:
+            self.log(f"Status poll state {state.value}, next poll in {interval:.1f} s (base {base:.1f} s, offline streak {self.offline_streak})")
+
+        self.state = state
+        self.base = base
+        self.interval = interval
+        return interval
@@ -1,11 +1,39 @@
+import time
 import socket
+import asyncio
 from steam import game_servers as gs
 
+from .a2s import A2SClient, A2SError
+
+class ServerSnapshot:
+
+    def __init__(self, info=None, players=None, error=None):
+        self.info = info
+        self.players = players if players is not None else []
+        self.error = error
+        self.timestamp = time.monotonic()
+
+    @property
+    def online(self):
+        return self.info is not None
+
+    @property
+    def age(self):
+        return time.monotonic() - self.timestamp
+
 class Server:
 
-    def __init__(self, ip, base_port):
+    def __init__(self, ip, base_port, timeout=3.0, retries=2, snapshot_ttl=10.0, name="main", displayed_ip=None):
+        self.name = name
         self.ip = ip
+        self.displayed_ip = displayed_ip if displayed_ip else ip
+        self.base_port = base_port
         self.query_port = base_port + 1
+        self.a2s = A2SClient(self.ip, self.query_port, timeout, retries)
+
+        self.snapshot_ttl = snapshot_ttl
+        self.__snapshot = None
+        self.__snapshot_task = None
 
     def getInfo(self):
         try:
@@ -24,4 +52,91 @@ class Server:
             self.getInfo()
             return True
         except:
-            return False
\ No newline at end of file
+            return False
+
+    async def get_info(self):
+        try:
+            return await self.a2s.info()
+        except A2SError:
+            raise RuntimeError("Failed to get server info")
+
+    async def get_players(self):
+        try:
+            return await self.a2s.players()
+        except A2SError:
+            raise RuntimeError("Failed to get server players")
+
+    async def async_ping(self):
+        try:
+            await self.get_info()
+            return True
+        except RuntimeError:
+            return False
+
+    @property
+    def cached_snapshot(self):
+        return self.__snapshot
+
+    async def __fetch_snapshot(self):
+        try:
+            info = await self.get_info()
+        except RuntimeError as e:
+            return ServerSnapshot(error=str(e))
+
+        players = []
+        if (info["players"]):
+            try:
+                players = await self.get_players()
+            except RuntimeError as e:
+                return ServerSnapshot(info, players, str(e))
+
+        return ServerSnapshot(info, players)
+
+    async def snapshot(self, max_age=None):
+        if max_age is None:
+            max_age = self.snapshot_ttl
+
+        if self.__snapshot and self.__snapshot.age <= max_age:
+            return self.__snapshot
+
+        # Concurrent callers share one in-flight query
+        if self.__snapshot_task is None or self.__snapshot_task.done():
+            self.__snapshot_task = asyncio.create_task(self.__fetch_snapshot())
+
+        snapshot = await asyncio.shield(self.__snapshot_task)
+
+        if self.__snapshot is None or snapshot.timestamp >= self.__snapshot.timestamp:
+            self.__snapshot = snapshot
+
+        return snapshot
+
+class ServerFleet:
+
+    def __init__(self, servers: list):
+        if not servers:
+            raise RuntimeError("Server fleet must contain at least one server")
+
+        self.servers = {}
+        for srv in servers:
+            if srv.name in self.servers:
+                raise RuntimeError(f"Duplicate server name {srv.name}")
+            self.servers[srv.name] = srv
+
+    @property
+    def default(self):
+        return next(iter(self.servers.values()))
+
+    def get(self, name):
+        return self.servers.get(name)
+
+    def __iter__(self):
+        return iter(self.servers.values())
+
+    def __len__(self):
+        return len(self.servers)
+
+    async def poll(self, max_age=None):
+        # Servers are queried concurrently, so a tick costs as much as the slowest one
+        servers = list(self.servers.values())
+        snapshots = await asyncio.gather(*[srv.snapshot(max_age) for srv in servers])
+        return dict(zip([srv.name for srv in servers], snapshots))
@@ -1,2 +1,2 @@
 from .db import Database
-from .db_tables import Admin, Mod, ZeusUser, Base
\ No newline at end of file
+from .db_tables import Admin, Mod, ModUpdateJob, ModUpdateHistory, ZeusUser, Base
\ No newline at end of file
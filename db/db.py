@@ -1,22 +1,101 @@
-from sqlalchemy import create_engine, Table, MetaData
+from sqlalchemy import create_engine, inspect, text, Table, MetaData
 from sqlalchemy.orm import sessionmaker
+from concurrent.futures import ThreadPoolExecutor
 import threading
+import asyncio
+import time
 
 from .db_tables import Base
 
+class DatabaseMetrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.query_total = 0.0
+        self.query_max = 0.0
+
+    def record(self, wait, took, failed):
+        with self._lock:
+            self.queries += 1
+            self.errors += int(failed)
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.query_total += took
+            self.query_max = max(self.query_max, took)
+
+    def stats(self):
+        with self._lock:
+            queries = self.queries or 1
+            return {
+                "queries":      self.queries,
+                "errors":       self.errors,
+                "in_flight":    self.in_flight,
+                "wait_avg_ms":  f"{self.wait_total / queries * 1000:.2f}",
+                "wait_max_ms":  f"{self.wait_max * 1000:.2f}",
+                "query_avg_ms": f"{self.query_total / queries * 1000:.2f}",
+                "query_max_ms": f"{self.query_max * 1000:.2f}",
+            }
+
 class Database:
 
-    def __init__(self, host: str, port: int, user: str, passwd: str, db: str):
-        self._semaphore = threading.Semaphore(15)
+    def __init__(self, host: str, port: int, user: str, passwd: str, db: str, pool_size: int = 15):
+        self._semaphore = threading.Semaphore(pool_size)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="db")
+        self.metrics = DatabaseMetrics()
 
-        self.engine = create_engine('mysql+mysqlconnector://{}:{}@{}:{}/{}'.format(user, passwd, host, port, db), connect_args={'connect_timeout': 10})
+        self.engine = create_engine('mysql+mysqlconnector://{}:{}@{}:{}/{}'.format(user, passwd, host, port, db),
+                                    connect_args={'connect_timeout': 10},
+                                    pool_size=pool_size,
+                                    pool_pre_ping=True)
         self.Session = sessionmaker(bind=self.engine)
 
         Base.metadata.create_all(self.engine)
+        self.__addMissingColumns()
+
+    def __addMissingColumns(self):
+        # create_all() does not touch existing tables, new nullable columns are added here
+        inspector = inspect(self.engine)
+
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+                for column in table.columns:
+                    if column.name in existing or not column.nullable:
+                        continue
+
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
         
     def getTable(self, name):
         metadata = MetaData()
         return Table(name, metadata, autoload_with=self.engine)
     
     def dropTable(self, table):
-        table.delete(self.engine)
\ No newline at end of file
+        table.delete(self.engine)
+
+    def __timed(self, func, queued_at):
+        with self._semaphore:
+            started_at = time.monotonic()
+            failed = True
+            try:
+                output = func()
+                failed = False
+                return output
+            finally:
+                self.metrics.record(started_at - queued_at, time.monotonic() - started_at, failed)
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        queued_at = time.monotonic()
+
+        self.metrics.in_flight += 1
+        try:
+            return await loop.run_in_executor(self._executor, self.__timed, lambda: func(*args, **kwargs), queued_at)
+        finally:
+            self.metrics.in_flight -= 1
@@ -6,7 +6,7 @@ Base = declarative_base()
 
 class Wrapper():
     def to_dict(self):
-        return {c.key: getattr(self, c.key) for c in class_mapper(self.__class__).mapped_table.c}
+        return {c.key: getattr(self, c.key) for c in class_mapper(self.__class__).local_table.c}
 
 class Admin(Base, Wrapper):
     __tablename__ = "bot_admins"
@@ -22,6 +22,36 @@ class Mod(Base, Wrapper):
     folder_name = sa.Column(sa.Text, nullable=False)
     mod_id = sa.Column(sa.Text, nullable=False)
     status = sa.Column(sa.Integer, nullable=True, default=0)
+    installed_updated = sa.Column(sa.BigInteger, nullable=True)
+    installed_size = sa.Column(sa.BigInteger, nullable=True)
+    manifest_id = sa.Column(sa.Text, nullable=True)
+    remote_updated = sa.Column(sa.BigInteger, nullable=True)
+    checked_at = sa.Column(sa.BigInteger, nullable=True)
+    normalised_updated = sa.Column(sa.BigInteger, nullable=True)
+
+class ModUpdateJob(Base, Wrapper):
+    __tablename__ = "mod_update_jobs"
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    state = sa.Column(sa.Integer, nullable=False, default=0)
+    phase = sa.Column(sa.Text, nullable=True)
+    validation = sa.Column(sa.Text, nullable=True)
+    validate_ids = sa.Column(sa.Text, nullable=True)
+    channel_id = sa.Column(sa.BigInteger, nullable=True)
+    started_at = sa.Column(sa.BigInteger, nullable=True)
+    updated_at = sa.Column(sa.BigInteger, nullable=True)
+    error = sa.Column(sa.Text, nullable=True)
+
+class ModUpdateHistory(Base, Wrapper):
+    __tablename__ = "mod_update_history"
+
+    id = sa.Column(sa.Integer, primary_key=True, autoincrement=True)
+    job_id = sa.Column(sa.Integer, nullable=True)
+    mod_id = sa.Column(sa.Text, nullable=False)
+    started_at = sa.Column(sa.BigInteger, nullable=False)
+    duration = sa.Column(sa.Float, nullable=False)
+    bytes = sa.Column(sa.BigInteger, nullable=True)
+    outcome = sa.Column(sa.Text, nullable=False)
 
 class ZeusUser(Base, Wrapper):
     __tablename__ = "player_access"
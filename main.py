@@ -1,13 +1,15 @@
 import app
 from modules import *
 
-_app = app.App()
+# Job worker processes are spawned and re-import this file, the bot must only start in the parent
+if __name__ == "__main__":
+    _app = app.App()
 
-_app.addModule(PrivSystem, "PrivSystem")
-_app.addModule(ModUpdater, "ModUpdater")
-_app.addModule(ServerRestarter, "ServerRestarter")
-_app.addModule(MissionUploader, "MissionUploader")
-_app.addModule(MiscCommands, "MiscCommands")
-_app.addModule(ZeusManager, "ZeusManager")
+    _app.addModule(PrivSystem, "PrivSystem")
+    _app.addModule(ModUpdater, "ModUpdater")
+    _app.addModule(ServerRestarter, "ServerRestarter")
+    _app.addModule(MissionUploader, "MissionUploader")
+    _app.addModule(MiscCommands, "MiscCommands")
+    _app.addModule(ZeusManager, "ZeusManager")
 
-_app.run()
\ No newline at end of file
+    _app.run()
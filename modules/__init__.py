@@ -3,6 +3,8 @@ from .priv_system import PrivSystemLevels
 
 from .mission_uploader import MissionUploader
 from .mod_updater import ModUpdater
+from .mod_registry import ModStatus, ModRegistry
+from .mod_links import ModLinkReconciler
 from .server_restarter import ServerRestarter
 from .misc_commands import MiscCommands
 from .zeus_manager import ZeusManager
@@ -1,5 +1,8 @@
+import time
 import asyncio 
 
+from datetime import datetime, timedelta, timezone
+
 import discord
 from discord.ext import commands
 
@@ -7,56 +10,170 @@ from app import App, AppModule
 from utils import LogLevel, BotInternalException
 from .priv_system import PrivSystem, PrivSystemLevels
 
+BULK_DELETE_LIMIT   = 100
+BULK_DELETE_MAX_AGE = timedelta(days=14, minutes=-5)
+
+class MessagePurge:
+
+    def __init__(self, module: AppModule, ctx: commands.Context, predicate, before=None, after=None, single_delay=1.0, progress_interval=5.0):
+        self.module = module
+        self.ctx = ctx
+        self.channel = ctx.channel
+        self.predicate = predicate
+        self.before = before
+        self.after = after
+        self.single_delay = single_delay
+        self.progress_interval = progress_interval
+
+        self.progress_msg = None
+        self.cancelled = False
+        self.scanned = 0
+        self.deleted = 0
+        self.failed = 0
+
+        self.__bulk = []
+        self.__last_progress = 0
+
+    @property
+    def bulk_allowed(self):
+        return not isinstance(self.channel, (discord.DMChannel, discord.GroupChannel))
+
+    def cancel(self):
+        self.cancelled = True
+
+    def status(self):
+        return f"scanned {self.scanned}, removed {self.deleted}, failed {self.failed}"
+
+    async def __report(self, force=False):
+        now = time.monotonic()
+        if self.progress_msg is None or (not force and now - self.__last_progress < self.progress_interval):
+            return
+
+        self.__last_progress = now
+        await self.module.edit(self.progress_msg, f"Cleaning messages: {self.status()}", None)
+
+    async def __flush_bulk(self):
+        if not self.__bulk:
+            return
+
+        batch, self.__bulk = self.__bulk, []
+        try:
+            await self.channel.delete_messages(batch)
+            self.deleted += len(batch)
+        except discord.HTTPException as e:
+            self.module.log(f"Bulk delete of {len(batch)} messages failed: {e}", LogLevel.WARN)
+            self.failed += len(batch)
+
+    async def __delete_single(self, message: discord.Message):
+        try:
+            await message.delete()
+            self.deleted += 1
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            self.module.log(f"Failed to delete message {message.id}: {e}", LogLevel.WARN)
+            self.failed += 1
+
+        await asyncio.sleep(self.single_delay)
+
+    async def run(self):
+        self.progress_msg = await self.module.send(self.ctx, "Cleaning messages...", None)
+        bulk_cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+
+        async for message in self.channel.history(limit=None, before=self.before, after=self.after):
+            if self.cancelled:
+                break
+
+            self.scanned += 1
+
+            if self.progress_msg and message.id == self.progress_msg.id:
+                continue
+
+            if not self.predicate(message):
+                continue
+
+            _server = message.guild.name if message.guild else 'DM'
+            _ch = 'DM' if _server == 'DM' else message.channel
+            self.module.log(f"Removing message [{_server}][{_ch}][{message.created_at}] <{message.author}> -> {message.content}")
+
+            if self.bulk_allowed and message.created_at > bulk_cutoff:
+                self.__bulk.append(message)
+                if len(self.__bulk) >= BULK_DELETE_LIMIT:
+                    await self.__flush_bulk()
+            else:
+                await self.__delete_single(message)
+
+            await self.__report()
+
+        await self.__flush_bulk()
+
+        result = f"{'Cancelled' if self.cancelled else 'Finished'} cleaning: {self.status()}"
+        if self.progress_msg:
+            await self.module.edit(self.progress_msg, result)
+        else:
+            await self.module.send(self.ctx, result)
+
+        return self.deleted
+
 class MiscCommands(commands.Cog, AppModule):
     def __init__(self, app: App):
         super(MiscCommands, self).__init__(app)
+        self.purges = {}
 
-    async def remove_list(self, ctx, messages):
-        channel = ctx.message.channel
+    def parseDate(self, value):
+        if value is None:
+            return None
 
-        if isinstance(channel, discord.DMChannel):
-            for msg in messages:
-                await msg.delete()
-                await asyncio.sleep(1)
-        else:
-            await channel.delete_messages(messages)
+        try:
+            date = datetime.fromisoformat(value)
+        except ValueError:
+            raise BotInternalException(f"Invalid date {value}, expected YYYY-MM-DD[ HH:MM]")
+
+        return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+    async def purge(self, ctx: commands.Context, predicate, before=None, after=None):
+        channel_id = ctx.channel.id
+        if channel_id in self.purges:
+            raise BotInternalException("Cleaning is already running in this channel, use 'cleanmsg cancel' to stop it")
+
+        purge = MessagePurge(self, ctx, predicate,
+                             before=self.parseDate(before),
+                             after=self.parseDate(after),
+                             single_delay=self.settings.get("purge_single_delay", 1.0))
+        self.purges[channel_id] = purge
+
+        try:
+            return await purge.run()
+        finally:
+            del self.purges[channel_id]
 
     @commands.hybrid_group(name="cleanmsg", fallback="onlybot")
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
-    async def clean(self, ctx: commands.Context):
+    async def clean(self, ctx: commands.Context, before: str = None, after: str = None):
         self.log("Triggered cleanmsg onlybot")
-        channel = ctx.message.channel
-        
-        messages = []
-
-        async for message in channel.history(limit=None):
-            if message.author == self.bot.user:
-                messages.append(message)
-                _server = message.guild.name if message.guild else 'DM'
-                _ch = 'DM' if _server == 'DM' else message.channel
-
-                self.log(f"Removing message [{_server}][{_ch}][{message.created_at}] <{message.author}> -> {message.content}")
-        
-        await self.remove_list(ctx, messages)
-        await self.send(ctx, f"Removed {len(messages)}")
+        await self.purge(ctx, lambda m: m.author == self.bot.user, before, after)
 
     @clean.command(name="all")
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
-    async def cleanAll(self, ctx: commands.Context):
+    async def cleanAll(self, ctx: commands.Context, before: str = None, after: str = None):
         self.log("Triggered cleanmsg all")
-        channel = ctx.message.channel
-        
-        messages = []
+        await self.purge(ctx, lambda m: True, before, after)
 
-        async for message in channel.history(limit=None):
-            messages.append(message)
-            _server = message.guild.name if message.guild else 'DM'
-            _ch = 'DM' if _server == 'DM' else message.channel
+    @clean.command(name="user")
+    @PrivSystem.withPriv(PrivSystemLevels.OWNER)
+    async def cleanUser(self, ctx: commands.Context, mention: discord.User, before: str = None, after: str = None):
+        self.log(f"Triggered cleanmsg user {mention.id}")
+        await self.purge(ctx, lambda m: m.author.id == mention.id, before, after)
 
-            self.log(f"Removing message [{_server}][{_ch}][{message.created_at}] <{message.author}> -> {message.content}")
+    @clean.command(name="cancel")
+    @PrivSystem.withPriv(PrivSystemLevels.OWNER)
+    async def cleanCancel(self, ctx: commands.Context):
+        purge = self.purges.get(ctx.channel.id)
+        if purge is None:
+            raise BotInternalException("Nothing to cancel, no cleaning is running in this channel")
 
-        await self.remove_list(ctx, messages)
-        await self.send(ctx, f"Removed {len(messages)}")
+        purge.cancel()
+        await self.send(ctx, "Cleaning will stop after the current message")
 
     @commands.hybrid_command()
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
@@ -68,4 +185,24 @@ class MiscCommands(commands.Cog, AppModule):
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
     async def maintenance_toggle(self, ctx: commands.Context):
         mode = self.bot.toggleMaintenanceMode()
-        await self.send(ctx, f"Maintenance mode {'enabled' if mode else 'disabled'}")
\ No newline at end of file
+        await self.send(ctx, f"Maintenance mode {'enabled' if mode else 'disabled'}")
+
+    @commands.hybrid_command()
+    @PrivSystem.withPriv(PrivSystemLevels.OWNER)
+    async def outbox(self, ctx: commands.Context):
+        stats = '\n'.join(f"{name:15}: {value}" for name, value in self.bot.outbox.stats().items())
+        await self.send(ctx, f"Outbox status\n```{stats}```")
+
+    @commands.hybrid_command()
+    @PrivSystem.withPriv(PrivSystemLevels.OWNER)
+    async def dbstats(self, ctx: commands.Context):
+        stats = '\n'.join(f"{name:15}: {value}" for name, value in self.db.metrics.stats().items())
+        await self.send(ctx, f"Database status\n```{stats}```")
+
+    @commands.hybrid_command()
+    @PrivSystem.withPriv(PrivSystemLevels.OWNER)
+    async def workerstats(self, ctx: commands.Context):
+        lines = [f"{name:15}: {value}" for name, value in self.worker.stats().items()]
+        lines += [f"{job.id} {job.name}: {job.last_event or 'started'} ({int(time.time() - job.started_at)} s)" for job in self.worker.jobs()]
+        details = '\n'.join(lines)
+        await self.send(ctx, f"Job worker status\n```{details}```")
@@ -1,11 +1,10 @@
-import subprocess
-
 import discord
 from discord.ext import commands
 
 from app import App, AppModule
-from utils import LogLevel, BotInternalException, PBOManipulator
+from utils import LogLevel, BotInternalException, download_attachment
 from .priv_system import PrivSystem, PrivSystemLevels
+from .worker_jobs import unpack_mission, pack_mission
 
 class MissionUploader(AppModule):
     def __init__(self, app: App):
@@ -28,26 +27,34 @@ class MissionUploader(AppModule):
         mission_name = self.settings["mission_name"]
         mission_file = f"{mission_name}.pbo"
 
-        pbo = PBOManipulator(mission_file, mission_path)
-        pbo.clean()
-        pbo.unpack()
-
-        for file in self.files:
-            basepath, name, ext = file
-
-            _tmp = attachment.filename.split(".")
-            _ext = _tmp[-1]
-            _name = ".".join(_tmp[:-1])
-            
-            if (ext == _ext):
-                if (name == _name):
-                    self.log(f"Updating file {mission_path}/{basepath}/{name}.{ext}")
-                    msg = await self.send(ctx, f"Detected {name}.{ext}. Starting update...")
-                    out = subprocess.run(f"wget -O {mission_path}/{mission_name}/{basepath}/{name}.{ext} {attachment.url}", check=True, text=True, capture_output=True, shell=True)
-                    self.log(f"\n{out.stderr}")
-                    
-                    await self.edit(msg, f"{name} update finished!")
-
-        pbo.update()
-        pbo.pack()
-        pbo.clean()
\ No newline at end of file
+        await self.worker.submit(unpack_mission, mission_file, mission_path, progress=self.__progress)
+
+        try:
+            for file in self.files:
+                basepath, name, ext = file
+
+                _tmp = attachment.filename.split(".")
+                _ext = _tmp[-1]
+                _name = ".".join(_tmp[:-1])
+                
+                if (ext == _ext):
+                    if (name == _name):
+                        self.log(f"Updating file {mission_path}/{basepath}/{name}.{ext}")
+                        msg = await self.send(ctx, f"Detected {name}.{ext}. Starting update...")
+
+                        try:
+                            handle = await download_attachment(attachment, self.settings.get("max_attachment_size"))
+                            await handle.save(f"{mission_path}/{mission_name}/{basepath}/{name}.{ext}")
+                        except Exception as e:
+                            self.log(f"Failed to update {name}.{ext}: {e}", LogLevel.ERR)
+                            await self.edit(msg, f"{name} update failed: {e}")
+                            continue
+
+                        self.log(f"Downloaded {attachment.filename} ({handle.size} bytes, sha256 {handle.sha256})")
+                        await self.edit(msg, f"{name} update finished!")
+        finally:
+            # The mission must never be left unpacked, even when the update failed
+            await self.worker.submit(pack_mission, mission_file, mission_path, progress=self.__progress)
+
+    def __progress(self, message, data):
+        self.log(message)
\ No newline at end of file
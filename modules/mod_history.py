@@ -0,0 +1,58 @@
+import math
+
+from collections import defaultdict, deque, Counter
+
+def percentile(values, q):
+    if not values:
+        return 0
+
+    values = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+class ModHistory:
+
+    def __init__(self, depth=10):
+        self.depth = depth
+        self.__runs = defaultdict(lambda: deque(maxlen=self.depth))
+        self.outcomes = Counter()
+
+    def __len__(self):
+        return sum(len(runs) for runs in self.__runs.values())
+
+    def add(self, mod_id, duration, size, outcome):
+        self.outcomes[outcome] += 1
+
+        # Only completed downloads say anything about speed
+        if outcome != "UPDATED" or duration <= 0:
+            return
+        self.__runs[mod_id].append((duration, size or 0))
+
+    def durations(self, mod_id=None):
+        runs = self.__runs.get(mod_id, ()) if mod_id else [run for runs in self.__runs.values() for run in runs]
+        return [duration for duration, size in runs]
+
+    def throughputs(self, mod_id=None):
+        runs = self.__runs.get(mod_id, ()) if mod_id else [run for runs in self.__runs.values() for run in runs]
+        return [size / duration for duration, size in runs if size]
+
+    def predict(self, mod_id, size=None):
+        # The mod's own history first, the other mods only when it has none
+        throughputs = self.throughputs(mod_id)
+        if size and throughputs:
+            return size / percentile(throughputs, 50)
+
+        durations = self.durations(mod_id)
+        if durations:
+            return percentile(durations, 50)
+
+        throughputs = self.throughputs()
+        if size and throughputs:
+            return size / percentile(throughputs, 50)
+
+        # Without any history a slow but plausible 5 MB/s is assumed
+        return (size or 0) / (5 * 1024 * 1024)
+
+    def slowest(self, count=10):
+        medians = [(percentile([duration for duration, size in runs], 50), mod_id) for mod_id, runs in self.__runs.items() if runs]
+        return sorted(medians, reverse=True)[:count]
@@ -0,0 +1,67 @@
+import json
+import time
+
+from enum import Enum
+
+JOB_PHASES = ("plan", "download", "validate", "normalise", "link", "keys")
+
+class JobState(Enum):
+    ACTIVE                  = 0
+    DONE                    = 1
+    FAILED                  = 2
+    CANCELLED               = 3
+
+class ModJob:
+    __slots__ = ("id", "state", "phase", "validation", "validate_ids", "channel_id", "started_at", "updated_at", "error")
+
+    def __init__(self, job_id=None, validation=None, channel_id=None):
+        self.id = job_id
+        self.state = JobState.ACTIVE
+        self.phase = None
+        self.validation = validation
+        self.validate_ids = []
+        self.channel_id = channel_id
+        self.started_at = int(time.time())
+        self.updated_at = self.started_at
+        self.error = None
+
+    @property
+    def active(self):
+        return self.state == JobState.ACTIVE
+
+    def remaining_phases(self):
+        if self.phase is None:
+            return JOB_PHASES
+        return JOB_PHASES[JOB_PHASES.index(self.phase) + 1:]
+
+    def finish(self, state: JobState, error=None):
+        self.state = state
+        self.error = error
+        self.updated_at = int(time.time())
+
+    def checkpoint(self, phase):
+        self.phase = phase
+        self.updated_at = int(time.time())
+
+    def to_row(self):
+        return {
+            "state":        self.state.value,
+            "phase":        self.phase,
+            "validation":   self.validation,
+            "validate_ids": json.dumps(self.validate_ids),
+            "channel_id":   self.channel_id,
+            "started_at":   self.started_at,
+            "updated_at":   self.updated_at,
+            "error":        self.error,
+        }
+
+    @classmethod
+    def from_row(cls, row):
+        job = cls(row["id"], row["validation"], row["channel_id"])
+        job.state = JobState(row["state"])
+        job.phase = row["phase"]
+        job.validate_ids = json.loads(row["validate_ids"]) if row["validate_ids"] else []
+        job.started_at = row["started_at"]
+        job.updated_at = row["updated_at"]
+        job.error = row["error"]
+        return job
@@ -0,0 +1,130 @@
+import os
+import re
+
+from utils import Log, LogLevel
+from .mod_registry import ModRecord
+
+KEY_PATTERN = re.compile(r'key', re.I)
+KEY_EXTENSION = ".bikey"
+
+class ModLinkReconciler(Log):
+
+    def __init__(self, workshop_dir, mods_dir, keys_dir):
+        self.workshop_dir = os.path.realpath(workshop_dir)
+        self.mods_dir = mods_dir
+        self.keys_dir = keys_dir
+
+        self.__key_cache = {}
+
+    @property
+    def key_cache(self):
+        return self.__key_cache
+
+    def update_cache(self, key_cache):
+        self.__key_cache.update(key_cache)
+
+    def invalidate(self, mod_ids):
+        for mod_id in mod_ids:
+            self.__key_cache.pop(mod_id, None)
+
+    def find_keys(self, mod: ModRecord):
+        if mod.id in self.__key_cache:
+            return self.__key_cache[mod.id]
+
+        keys = []
+        for entry in os.scandir(mod.real_path):
+            if not KEY_PATTERN.search(entry.name):
+                continue
+
+            if entry.is_file() and entry.name.lower().endswith(KEY_EXTENSION):
+                # Key is placed in root directory
+                keys.append(entry.path)
+            elif entry.is_dir():
+                keys += [key.path for key in os.scandir(entry.path) if key.is_file() and key.name.lower().endswith(KEY_EXTENSION)]
+
+            if keys:
+                break
+
+        self.__key_cache[mod.id] = keys
+        return keys
+
+    def desired_mod_links(self, mods):
+        links = {}
+
+        for mod in mods:
+            if os.path.isdir(mod.real_path):
+                links[os.path.basename(mod.link_path)] = mod.real_path
+            else:
+                self.log(f"Mod '{mod.folder}' does not exist! ({mod.real_path})", LogLevel.WARN)
+
+        return links
+
+    def desired_key_links(self, mods):
+        links = {}
+
+        for mod in mods:
+            if not os.path.isdir(mod.real_path):
+                continue
+
+            keys = self.find_keys(mod)
+            if not keys:
+                self.log(f"!! Couldn't find key folder for mod {mod.folder} !!", LogLevel.WARN)
+
+            for key in keys:
+                links.setdefault(os.path.basename(key), key)
+
+        return links
+
+    def __is_managed(self, path):
+        # Links we didn't create (pointing outside the workshop directory) are left alone
+        target = os.path.realpath(path)
+        return target == self.workshop_dir or target.startswith(self.workshop_dir + os.sep) or not os.path.exists(path)
+
+    def __swap_link(self, target, path):
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+
+        os.symlink(target, tmp_path)
+        os.replace(tmp_path, path)
+
+    def reconcile(self, directory, desired):
+        added = removed = changed = 0
+        os.makedirs(directory, exist_ok=True)
+
+        existing = {}
+        for entry in os.scandir(directory):
+            if entry.is_symlink():
+                existing[entry.name] = os.readlink(entry.path)
+
+        for name, target in existing.items():
+            if name not in desired and self.__is_managed(os.path.join(directory, name)):
+                self.log(f"Removing link {name} from {directory}")
+                os.unlink(os.path.join(directory, name))
+                removed += 1
+
+        for name, target in desired.items():
+            path = os.path.join(directory, name)
+
+            if existing.get(name) == target:
+                continue
+
+            if os.path.lexists(path) and not os.path.islink(path):
+                self.log(f"Can't link {name}, {path} is not a symlink", LogLevel.WARN)
+                continue
+
+            self.log(f"{'Updating' if name in existing else 'Creating'} link {path} -> {target}")
+            self.__swap_link(target, path)
+
+            if name in existing:
+                changed += 1
+            else:
+                added += 1
+
+        return added, removed, changed
+
+    def reconcile_mods(self, mods):
+        return self.reconcile(self.mods_dir, self.desired_mod_links(mods))
+
+    def reconcile_keys(self, mods):
+        return self.reconcile(self.keys_dir, self.desired_key_links(mods))
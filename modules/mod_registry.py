@@ -0,0 +1,168 @@
+import time
+
+from enum import Enum
+
+class ModStatus(Enum):
+    UNKNOWN                 = 0
+    UP_TO_DATE              = 1
+    IN_QUEUE                = 2
+    IN_PROGRESS             = 3
+    WAIT_VALIDATION         = 4
+    VALIDATING              = 5
+    VALIDATING_NEW          = 6
+    UPDATED                 = 7
+    FAILED                  = 8
+
+class ModRecord:
+    __slots__ = ("folder", "id", "real_path", "link_path", "start_time", "end_time",
+                 "remote_updated", "file_size", "manifest_id", "checked_at",
+                 "installed_updated", "installed_size", "installed_manifest",
+                 "normalised_updated", "bytes_received", "bytes_total", "_status")
+
+    def __init__(self, folder, mod_id, real_path, link_path, status=ModStatus.UNKNOWN):
+        self.folder = folder
+        self.id = mod_id
+        self.real_path = real_path
+        self.link_path = link_path
+        self.start_time = 0
+        self.end_time = 0
+        self.remote_updated = None
+        self.file_size = None
+        self.manifest_id = None
+        self.checked_at = None
+        self.installed_updated = None
+        self.installed_size = None
+        self.installed_manifest = None
+        self.normalised_updated = None
+        self.bytes_received = 0
+        self.bytes_total = None
+        self._status = status
+
+    @property
+    def status(self):
+        return self._status
+
+    def is_fresh(self, window, now=None):
+        now = now if now else time.time()
+        return self.checked_at is not None and now - self.checked_at < window
+
+    def has_pending_update(self):
+        if self.installed_updated is None or self.remote_updated is None:
+            return None
+        return self.remote_updated > self.installed_updated
+
+    def reset_progress(self):
+        self.start_time = 0
+        self.end_time = 0
+        self.bytes_received = 0
+        self.bytes_total = None
+
+    def mark_installed(self):
+        self.installed_updated = self.remote_updated
+        self.installed_size = self.file_size
+        self.installed_manifest = self.manifest_id
+
+    def is_normalised(self):
+        return self.normalised_updated is not None and self.normalised_updated == self.installed_updated
+
+    @property
+    def throughput(self):
+        took = self.took
+        return self.bytes_received / took if took else 0
+
+    @property
+    def took(self):
+        if self.start_time == 0:
+            return 0
+
+        end_time = self.end_time if self.end_time else time.time_ns()
+        return (end_time - self.start_time) / 1000000000
+
+class ModRegistry:
+
+    def __init__(self, workshop_dir, mods_dir):
+        self.workshop_dir = workshop_dir
+        self.mods_dir = mods_dir
+
+        self.__by_id = {}
+        self.__by_folder = {}
+        # Dicts are used as insertion-ordered sets
+        self.__by_status = {status: {} for status in ModStatus}
+
+    def __len__(self):
+        return len(self.__by_id)
+
+    def __iter__(self):
+        return iter(list(self.__by_id.values()))
+
+    def __contains__(self, mod_id):
+        return mod_id in self.__by_id
+
+    def ids(self):
+        return list(self.__by_id)
+
+    def add(self, folder, mod_id, status=ModStatus.UNKNOWN):
+        if mod_id in self.__by_id:
+            self.remove(mod_id)
+
+        mod = ModRecord(folder, mod_id, f"{self.workshop_dir}/{mod_id}", f"{self.mods_dir}/{folder}", status)
+        self.__by_id[mod_id] = mod
+        self.__by_folder[folder] = mod
+        self.__by_status[status][mod_id] = mod
+        return mod
+
+    def remove(self, mod_id):
+        mod = self.__by_id.pop(mod_id, None)
+        if mod is None:
+            return None
+
+        if self.__by_folder.get(mod.folder) is mod:
+            del self.__by_folder[mod.folder]
+        self.__by_status[mod.status].pop(mod_id, None)
+        return mod
+
+    def rename(self, mod_id, folder):
+        mod = self.__by_id[mod_id]
+
+        if self.__by_folder.get(mod.folder) is mod:
+            del self.__by_folder[mod.folder]
+
+        mod.folder = folder
+        mod.link_path = f"{self.mods_dir}/{folder}"
+        self.__by_folder[folder] = mod
+        return mod
+
+    def clear(self):
+        self.__by_id.clear()
+        self.__by_folder.clear()
+        for index in self.__by_status.values():
+            index.clear()
+
+    def get(self, mod_id):
+        return self.__by_id.get(mod_id)
+
+    def by_folder(self, folder):
+        return self.__by_folder.get(folder)
+
+    def set_status(self, mod: ModRecord, status: ModStatus):
+        if mod.status == status:
+            return
+
+        self.__by_status[mod.status].pop(mod.id, None)
+        self.__by_status[status][mod.id] = mod
+        mod._status = status
+
+    def with_status(self, *statuses):
+        mods = []
+        for status in statuses:
+            mods += self.__by_status[status].values()
+        return mods
+
+    def without_status(self, *statuses):
+        return [mod for mod in self.__by_id.values() if mod.status not in statuses]
+
+    def count(self, status):
+        return len(self.__by_status[status])
+
+    def counts(self):
+        return {status: len(index) for status, index in self.__by_status.items() if index}
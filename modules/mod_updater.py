@@ -1,23 +1,30 @@
 import os
-import re
+import glob
 import time
-import shutil
 import asyncio
-import subprocess
+
+import sqlalchemy as sa
 
 from datetime import datetime
-from enum import Enum
-from bs4 import BeautifulSoup
 
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 from app import *
 from .priv_system import *
-from utils import LogLevel, to_thread, to_task, fetch_url, sessioned
-from db import Mod
+from utils import LogLevel, BotInternalException, to_thread, to_task, asessioned, download_attachment, WorkshopClient, FileManifest
+from utils.workshop import WORKSHOP_DETAILS_URL, WORKSHOP_CHANGELOG_URL
+from db import Mod, ModUpdateJob, ModUpdateHistory
+from .mod_registry import ModStatus, ModRecord, ModRegistry
+from .mod_links import ModLinkReconciler
+from .mod_job import ModJob, JobState, JOB_PHASES
+from .mod_history import ModHistory, percentile
+from .worker_jobs import remove_tree, normalise_lowercase, reconcile_links
+from .preset_parser import parse_preset
+from .steamcmd_parser import SteamCmdParser, StartEvent, SuccessEvent, TimeoutEvent, ErrorEvent, ProgressEvent
 
 
 STEAM_CMD = "/home/arma3server/.steam/steamcmd/steamcmd.sh"
+STEAMCMD_READ_SIZE = 4096
 
 A3_SERVER_ID = "233780"
 A3_SERVER_DIR = "/home/arma3server/serverfiles"
@@ -27,23 +34,11 @@ A3_WORKSHOP_DIR = f"{A3_SERVER_DIR}/steamapps/workshop/content/{A3_WORKSHOP_ID}"
 A3_MODS_DIR = f"{A3_SERVER_DIR}/mods"
 A3_KEYS_DIR = f"{A3_SERVER_DIR}/keys"
 
-UPDATE_PATTERN = re.compile(r"workshopAnnouncement.*?<p id=\"(\d+)\">", re.DOTALL)
-WORKSHOP_CHANGELOG_URL = "https://steamcommunity.com/sharedfiles/filedetails/changelog"
-
-MAIN_RUNSCRIPT_PATH = f"{A3_SERVER_DIR}/updater_runscript.steamcmd"
+MAIN_RUNSCRIPT_PATH = f"{A3_SERVER_DIR}/updater_runscript_{{}}.steamcmd"
 VALIDATE_RUNSCRIPT_PATH = f"{A3_SERVER_DIR}/validate_runscript.steamcmd"
 
-class ModStatus(Enum):
-    UNKNOWN                 = 0
-    UP_TO_DATE              = 1
-    IN_QUEUE                = 2
-    IN_PROGRESS             = 3
-    WAIT_VALIDATION         = 4
-    VALIDATING              = 5
-    VALIDATING_NEW          = 6
-    UPDATED                 = 7
-    FAILED                  = 8
-    
+VALIDATION_MODES = ("changed", "sampled", "full")
+
 class ModUpdater(commands.Cog, AppModule):
 
     def __init__(self, app: App):
@@ -52,89 +47,220 @@ class ModUpdater(commands.Cog, AppModule):
         self._check_settings_exist("steam_user")
         self._check_settings_exist("steam_password")
 
-        self.mod_list = []
+        self.mod_list = ModRegistry(A3_WORKSHOP_DIR, A3_MODS_DIR)
+        self.workshop = WorkshopClient(self.settings.get("workshop_details_url", WORKSHOP_DETAILS_URL),
+                                       self.settings.get("workshop_changelog_url", WORKSHOP_CHANGELOG_URL),
+                                       self.settings.get("workshop_batch_size", 100),
+                                       self.settings.get("workshop_concurrency", 4))
+        self.__status_flush_interval = self.settings.get("mod_status_flush_interval", 5)
+        self.__pending_status = {}
+        self.__timed_out = set()
+        self.__download_started = 0
+        self.manifests = FileManifest(self.settings.get("manifest_dir", "manifests"))
+        self.links = ModLinkReconciler(A3_WORKSHOP_DIR, A3_MODS_DIR, A3_KEYS_DIR)
+        self.__status_flush_task = None
+        self.__status_flush_lock = asyncio.Lock()
+        self.__update_lock = asyncio.Lock()
+        self.__watch_interval = self.settings.get("mod_watch_interval", 60) * 60
+        self.__last_watch = 0
+        self.__announced_updates = None
+        self.__maintenance_pending = False
+        self.job = None
+        self.history = ModHistory(self.settings.get("mod_history_depth", 10))
+        self.__predicted_download = 0
+        self.__job_task = None
+        self.__job_cancelled = False
+        self.__progress_msg = None
 
-        self.__loadModList()
         self.bot.setAttachmentExtHandler("html", self.loadPreset)
+
+    async def cog_load(self):
+        await self.__loadModList()
+        await self.__loadHistory()
+        self.__resume_task = asyncio.ensure_future(self.__resumeOnReady())
+
+        if self.__watch_interval:
+            self.watch_updates.start()
+
+    async def cog_unload(self):
+        self.watch_updates.cancel()
+        await self.flushModStatus()
+        await self.workshop.close()
     
     def __del__(self):
         self.__clean()
     
     @commands.hybrid_group(name="mods", fallback="update")
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
-    async def mods_update(self, ctx: commands.Context):       
+    async def mods_update(self, ctx: commands.Context, validation: str = None):       
         steam_user = self.settings["steam_user"]
         steam_password = self.settings["steam_password"]
+
+        if validation and validation not in VALIDATION_MODES:
+            raise BotInternalException(f"Unknown validation mode {validation}, use one of: {', '.join(VALIDATION_MODES)}")
         
-        await self.run_update(ctx, steam_user, steam_password)
+        await self.run_update(ctx, steam_user, steam_password, validation)
 
     @mods_update.command(name="genline")
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
     async def mods_genline(self, ctx: commands.Context, folder: str):
-        line = '\;'.join(f"{folder}/{mod['folder']}" for mod in self.mod_list)
+        line = '\;'.join(f"{folder}/{mod.folder}" for mod in self.mod_list)
         await self.send(ctx, f"Modline generated:\n```{line}```")
 
+    @mods_update.command(name="status")
+    @PrivSystem.withPriv(PrivSystemLevels.OWNER)
+    async def mods_status(self, ctx: commands.Context):
+        now = time.time()
+        pending = []
+        unknown = 0
+        checked = [mod.checked_at for mod in self.mod_list if mod.checked_at]
+
+        for mod in self.mod_list:
+            state = mod.has_pending_update()
+            if state:
+                pending.append(f"{mod.folder} ({mod.id}): installed {datetime.fromtimestamp(mod.installed_updated):%Y-%m-%d %H:%M}, workshop {datetime.fromtimestamp(mod.remote_updated):%Y-%m-%d %H:%M}")
+            elif state is None:
+                unknown += 1
+
+        last_check = f"{int((now - min(checked)) // 60)} min ago" if checked else "never"
+        summary = f"{len(self.mod_list)} mods, {len(pending)} with pending updates, {unknown} unknown, oldest check {last_check}"
+        details = '\n'.join(pending) if pending else "Everything is up to date"
+        await self.send(ctx, f"Mod status (cached): {summary}\n```{details}```")
+
+    @mods_update.command(name="stats")
+    @PrivSystem.withPriv(PrivSystemLevels.OWNER)
+    async def mods_stats(self, ctx: commands.Context):
+        durations = self.history.durations()
+        if not durations:
+            await self.send(ctx, "No mod download history yet")
+            return
+
+        throughputs = [throughput / 1048576 for throughput in self.history.throughputs()]
+        outcomes = ', '.join(f"{outcome}: {count}" for outcome, count in self.history.outcomes.most_common())
+        slowest = '\n'.join(f"{duration:8.1f} s  {self.findModByID(mod_id).folder if mod_id in self.mod_list else mod_id}"
+                            for duration, mod_id in self.history.slowest())
+
+        await self.send(ctx, f"Mod download stats ({len(durations)} downloads, {outcomes})\n"
+                             f"```duration   p50 {percentile(durations, 50):.1f} s, p95 {percentile(durations, 95):.1f} s\n"
+                             f"throughput p50 {percentile(throughputs, 50):.2f} MB/s, p95 {percentile(throughputs, 95):.2f} MB/s\n\n"
+                             f"Slowest mods (p50):\n{slowest}```")
+
+    @mods_update.group(name="job", fallback="status")
+    @PrivSystem.withPriv(PrivSystemLevels.OWNER)
+    async def mods_job_status(self, ctx: commands.Context):
+        job = self.job
+        if job is None:
+            row = await self.__queryLastJob()
+            job = ModJob.from_row(row) if row else None
+
+        if job is None:
+            await self.send(ctx, "No mod update jobs yet")
+            return
+
+        phases = ' -> '.join(f"[{phase}]" if phase == job.phase else phase for phase in JOB_PHASES)
+        error = f", error: {job.error}" if job.error else ""
+        await self.send(ctx, f"Mod update job {job.id} ({job.state.name}), started {datetime.fromtimestamp(job.started_at):%Y-%m-%d %H:%M}, "
+                             f"last checkpoint {datetime.fromtimestamp(job.updated_at):%Y-%m-%d %H:%M}{error}\n"
+                             f"```{phases}\n{self.__generate_status_summary()}```")
+
+    @mods_job_status.command(name="cancel")
+    @PrivSystem.withPriv(PrivSystemLevels.OWNER)
+    async def mods_job_cancel(self, ctx: commands.Context):
+        if not await self.cancelJob():
+            raise BotInternalException("No mod update job is running")
+
+        await self.send(ctx, "Cancelling the mod update job...")
+
     @PrivSystem.withPriv(PrivSystemLevels.OWNER, False)
     async def loadPreset(self, ctx: commands.Context, attachment: discord.Attachment):
+        # Records removed here may still be looked up by a running job's steamcmd callbacks
+        if self.__update_lock.locked() or (self.job and self.job.active):
+            await self.send(ctx, "A mod update or update check is running, send the preset again once it has finished")
+            return
+
         msg = await self.send(ctx, f"Detected preset file. Starting update...")
-        
-        out = subprocess.run(f"wget -O /tmp/preset.html {attachment.url}", check=True, text=True, capture_output=True, shell=True)
-        self.log(f"\n{out.stderr}")
-        
-        try:
-            with open("/tmp/preset.html", 'r') as file:
-                self.__cleanTable()
-                self.mod_list = []
-                
-                soup = BeautifulSoup(file.read(), 'html.parser')
-                
-                mod_rows = soup.find_all('tr', {'data-type': 'ModContainer'})
-                
-                for row in mod_rows:
-                    mod_name = row.find('td', {'data-type': 'DisplayName'}).text.strip()
-                    mod_link = row.find('a', {'data-type': 'Link'})['href']
-                    mod_id = mod_link.split('=')[-1]
-
-                    if not mod_name.startswith('@'):
-                        formatted_mod_name = re.sub(r'\W+', '_', mod_name).lower()
-                        formatted_mod_name = f"@{formatted_mod_name}"
-                    else:
-                        formatted_mod_name = mod_name
-
-                    self.log(f"Add mod from preset: {formatted_mod_name} ({mod_id})")
-                    self.__addMod(formatted_mod_name, mod_id)
-                    
-            self.__loadModList()
-            await self.edit(msg, f"Preset update finished, please run 'mod update' for complete updating!\nMod list\n```{self.__generate_mod_list()}```")
-        except Exception as e:
-            self.log(str(e))
-            await self.edit(msg, "Preset update failed!")
+
+        async with self.__update_lock:
+            try:
+                handle = await download_attachment(attachment, self.settings.get("max_attachment_size"), to_memory=True)
+                self.log(f"Downloaded preset {attachment.filename} ({handle.size} bytes, sha256 {handle.sha256})")
+
+                preset = await asyncio.to_thread(parse_preset, handle.text())
+                if not preset:
+                    raise BotInternalException("No mods found in the preset")
+
+                added = {mod_id: folder for mod_id, folder in preset.items() if mod_id not in self.mod_list}
+                removed = [mod_id for mod_id in self.mod_list.ids() if mod_id not in preset]
+                renamed = {mod_id: folder for mod_id, folder in preset.items()
+                           if mod_id in self.mod_list and self.findModByID(mod_id).folder != folder}
+
+                await self.__applyPreset(added, removed, renamed)
+
+                diff = []
+                for mod_id in removed:
+                    mod = self.mod_list.remove(mod_id)
+                    self.__pending_status.pop(mod_id, None)
+                    diff.append(f"- {mod.folder} ({mod_id})")
+                for mod_id, folder in renamed.items():
+                    diff.append(f"~ {self.findModByID(mod_id).folder} -> {folder} ({mod_id})")
+                    self.mod_list.rename(mod_id, folder)
+                for mod_id, folder in added.items():
+                    self.addMod(folder, mod_id)
+                    diff.append(f"+ {folder} ({mod_id})")
+
+                summary = f"{len(added)} added, {len(removed)} removed, {len(renamed)} renamed, {len(preset) - len(added) - len(renamed)} unchanged"
+                self.log(f"Preset {attachment.filename} applied: {summary}")
+
+                details = '\n'.join(diff) if diff else "Mod list is unchanged"
+                await self.edit(msg, f"Preset update finished ({summary}), please run 'mod update' for complete updating!\n```{details}```")
+            except Exception as e:
+                self.log(f"Preset update failed: {e}", LogLevel.ERR)
+                await self.edit(msg, f"Preset update failed: {e}")
 
 #--------------------------------------------------------------#
 #                        MOD UPDATE                            #
 #--------------------------------------------------------------#
-    async def __check_one_mod(self, mod):
-        mod_id = mod.get("id")
-        folder = mod.get("folder")
-        link_path = mod.get("link_path")
-        real_path = mod.get("real_path")
+    async def __check_one_mod(self, mod: ModRecord):
+        mod_id = mod.id
+        folder = mod.folder
+        real_path = mod.real_path
 
+        # The mod link stays in place during the download, the link phase swaps it afterwards
         if os.path.isdir(real_path):
-            if await self.__mod_needs_update(mod_id, real_path) or self.checkModStatus(mod, ModStatus.FAILED):
-                if os.path.exists(link_path):
-                    os.unlink(link_path)
-                    
-                # if os.path.exists(real_path):
-                #     shutil.rmtree(real_path)
-            else:
+            if not (self.__mod_needs_update(mod) or self.checkModStatus(mod, ModStatus.FAILED)):
                 self.setModStatus(mod, ModStatus.UP_TO_DATE)
                 self.log(f"No update required for \"{folder}\" ({mod_id})... SKIPPING")
                 return [False, mod]
         
         self.log(f"Required update for \"{folder}\" ({mod_id})")
         return [True, mod]
+
+    async def refreshWorkshopInfo(self, force=False):
+        now = time.time()
+        window = self.settings.get("workshop_freshness", 3600)
+
+        stale = [mod for mod in self.mod_list if force or not mod.is_fresh(window, now) or self.checkModStatus(mod, ModStatus.FAILED)]
+        self.log(f"Workshop info: {len(stale)} mods queried, {len(self.mod_list) - len(stale)} served from cache")
+
+        if not stale:
+            return stale
+
+        details = await self.workshop.get_details([mod.id for mod in stale])
+
+        for mod in stale:
+            item = details.get(mod.id)
+            if item is None:
+                continue
+
+            mod.remote_updated = item.time_updated
+            mod.file_size = item.file_size if item.file_size is not None else mod.file_size
+            mod.manifest_id = item.manifest_id if item.manifest_id is not None else mod.manifest_id
+            mod.checked_at = int(now)
+
+        return stale
     
     async def __check_mods_parallel(self):
+        await self.refreshWorkshopInfo()
         tasks = []
 
         for mod in self.mod_list:
@@ -144,13 +270,22 @@ class ModUpdater(commands.Cog, AppModule):
         results = await asyncio.gather(*tasks)
         return results
 
-    async def __generate_steamcmd_runscript(self, user, passwd):
-        update_lines = [
+    def __write_runscript(self, path, user, passwd, mod_ids):
+        lines = [
             f"force_install_dir {A3_SERVER_DIR}",
             f"login {user} {passwd}",
         ]
-        validate_lines = update_lines.copy()
-        
+
+        for mod_id in mod_ids:
+            lines.append(f"workshop_download_item {A3_WORKSHOP_ID} {mod_id} validate")
+
+        lines.append("quit")
+
+        with open(path, 'w') as file:
+            for line in lines:
+                file.write(line + '\n')
+
+    async def __plan_update(self, validation):
         answers = await self.__check_mods_parallel()
 
         for answer in answers:
@@ -158,199 +293,208 @@ class ModUpdater(commands.Cog, AppModule):
                 self.setModStatus(answer[1], ModStatus.WAIT_VALIDATION)
             else:
                 self.setModStatus(answer[1], ModStatus.IN_QUEUE)
-                update_lines.append(f"workshop_download_item {A3_WORKSHOP_ID} {answer[1]['id']} validate")
-                
-            validate_lines.append(f"workshop_download_item {A3_WORKSHOP_ID} {answer[1]['id']} validate")
 
-        validate_lines.append("quit")
-        update_lines.append("quit")
+        return await self.__select_validation(validation)
 
-        with open(MAIN_RUNSCRIPT_PATH, 'w') as file:
-            for line in update_lines:
-                file.write(line + '\n')
+    def __check_manifests(self, mods):
+        suspicious = []
 
-        with open(VALIDATE_RUNSCRIPT_PATH, 'w') as file:
-            for line in validate_lines:
-                file.write(line + '\n')
-                
-        return True
+        for mod in mods:
+            ok, reason = self.manifests.verify(mod.id, mod.real_path)
+            if not ok:
+                self.log(f"Local manifest check for {mod.folder} ({mod.id}) failed: {reason}")
+                suspicious.append(mod)
+
+        return suspicious
+
+    async def __select_validation(self, mode):
+        mode = mode if mode else self.settings.get("validation_mode", "changed")
+
+        queued = self.mod_list.with_status(ModStatus.IN_QUEUE)
+        waiting = self.mod_list.with_status(ModStatus.WAIT_VALIDATION)
+
+        if mode == "full":
+            selected = queued + waiting
+        else:
+            # Mods without a manifest or with changed files are validated by steamcmd
+            suspicious = await asyncio.to_thread(self.__check_manifests, waiting)
+            selected = queued + suspicious
+
+            if mode == "sampled":
+                rest = [mod for mod in waiting if mod not in suspicious]
+                rest.sort(key=lambda mod: self.manifests.validated_at(mod.id))
+                selected += rest[:self.settings.get("validation_sample_size", 10)]
+
+        selected_ids = {mod.id for mod in selected}
+        for mod in waiting:
+            if mod.id not in selected_ids:
+                self.setModStatus(mod, ModStatus.UP_TO_DATE)
+
+        self.log(f"Validation mode {mode}: {len(selected)} of {len(self.mod_list)} mods will be validated")
+        return [mod.id for mod in selected]
+
+    def __save_manifests(self, mod_ids):
+        for mod_id in mod_ids:
+            mod = self.findModByID(mod_id)
+            if mod and os.path.isdir(mod.real_path):
+                self.manifests.save(mod.id, mod.real_path)
+
+    def __plan_download_workers(self, mods, workers):
+        # Slowest mods first by past download times, each one goes to the least loaded worker
+        predicted = {mod.id: self.history.predict(mod.id, mod.file_size or mod.installed_size) for mod in mods}
+
+        plan = [[] for _ in range(max(1, min(workers, len(mods))))]
+        load = [0] * len(plan)
+
+        for mod in sorted(mods, key=lambda mod: predicted[mod.id], reverse=True):
+            # Mods without size or history predict 0, the item count keeps them spread out
+            worker = min(range(len(plan)), key=lambda index: (load[index], len(plan[index])))
+            plan[worker].append(mod)
+            load[worker] += predicted[mod.id]
+
+        plan = [mods for mods in plan if mods]
+        self.__predicted_download = max(load)
+        self.log(f"Download plan: {len(mods)} mods on {len(plan)} workers, predicted {self.__predicted_download / 60:.1f} min")
+        return plan
+
+    async def __run_downloads(self, user, passwd):
+        workers = self.settings.get("steamcmd_workers", 1)
+        retries = self.settings.get("steamcmd_retries", 2)
+
+        for attempt in range(retries + 1):
+            queued = self.mod_list.with_status(ModStatus.IN_QUEUE)
+            if not queued:
+                break
+
+            self.__timed_out.clear()
+            plan = self.__plan_download_workers(queued, workers)
+            tasks = []
+
+            for index, mods in enumerate(plan):
+                path = MAIN_RUNSCRIPT_PATH.format(index)
+                self.__write_runscript(path, user, passwd, [mod.id for mod in mods])
+                self.log(f"Download worker {index}: {len(mods)} mods")
+                tasks.append(self.__run_steamcmd(path, self.__update_success, self.__update_error, self.__update_timeout, self.__update_start, self.__update_progress))
+
+            await asyncio.gather(*tasks)
+            await self.flushModStatus()
+
+            if not self.__timed_out or attempt == retries:
+                break
+
+            self.log(f"Retrying {len(self.__timed_out)} timed out mods (attempt {attempt + 2}/{retries + 1})", LogLevel.WARN)
+            for mod_id in self.__timed_out:
+                mod = self.findModByID(mod_id)
+                if mod:
+                    self.setModStatus(mod, ModStatus.IN_QUEUE)
     
     def __clean(self):
-        if os.path.exists(MAIN_RUNSCRIPT_PATH):
-            os.remove(MAIN_RUNSCRIPT_PATH)
+        for item in glob.glob(MAIN_RUNSCRIPT_PATH.format("*")):
+            os.remove(item)
 
         if os.path.exists(VALIDATE_RUNSCRIPT_PATH):
             os.remove(VALIDATE_RUNSCRIPT_PATH)
             
-    def __remove_escape_sequences(self, data):
-        escape_pattern = re.compile(b'\x1b[^m]*m')
-        return escape_pattern.sub(b'', data)
-    
     @to_task
-    async def __run_steamcmd(self, runscript, fsuccess, ferror, ftimeout, fstart):
+    async def __run_steamcmd(self, runscript, fsuccess, ferror, ftimeout, fstart, fprogress=None):
         if not os.path.exists(runscript):
             self.log("runscript not found")
             return ""
 
-        process = await asyncio.create_subprocess_exec(STEAM_CMD, "+runscript", runscript, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        process = await asyncio.create_subprocess_exec(STEAM_CMD, "+runscript", runscript, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        parser = SteamCmdParser()
 
-        start_pattern   = re.compile(r'workshop_download_item \d+ (\d+)')
-        success_pattern = re.compile(r'Success\. Downloaded item (\d+)')
-        timeout_pattern = re.compile(r'ERROR! Timeout downloading item (\d+)')
-        error_pattern   = re.compile(r'ERROR! Download item (\d+) failed \(([^)]+)\)')
-        
         while True:
-            rawline = await process.stdout.readline()
-
-            rawline = self.__remove_escape_sequences(rawline)
-            
-            line = rawline.decode('ascii').replace('\n', '')
-
-            start_match     = start_pattern.search(line)
-            success_match   = success_pattern.search(line)
-            timeout_match   = timeout_pattern.search(line)
-            error_match     = error_pattern.search(line)
-
-            if success_match:
-                modid = success_match.group(1)
-                fsuccess(modid)
-                
-            if error_match:
-                modid = error_match.group(1)
-                error = error_match.group(2)
-                ferror(modid, error)
-
-            if timeout_match:
-                modid = timeout_match.group(1)
-                ftimeout(modid)
-                
-            if start_match:
-                modid = start_match.group(1)
-                fstart(modid)
+            try:
+                data = await process.stdout.read(STEAMCMD_READ_SIZE)
+            except asyncio.CancelledError:
+                process.kill()
+                raise
+
+            events = parser.feed(data) if data else parser.close()
+
+            for event in events:
+                if isinstance(event, ProgressEvent):
+                    if fprogress:
+                        fprogress(event.mod_id, event.received, event.total)
+                elif isinstance(event, StartEvent):
+                    fstart(event.mod_id)
+                elif isinstance(event, SuccessEvent):
+                    fsuccess(event.mod_id, event.size)
+                elif isinstance(event, TimeoutEvent):
+                    ftimeout(event.mod_id)
+                elif isinstance(event, ErrorEvent):
+                    ferror(event.mod_id, event.reason)
             
-            if not rawline:
+            if not data:
                 break
         
         await process.wait()
 
-    async def __mod_needs_update(self, mod_id, path):
-        if os.path.isdir(path):
-            response = await fetch_url("{}/{}".format(WORKSHOP_CHANGELOG_URL, mod_id))
-            match = UPDATE_PATTERN.search(response)
-
-            if match:
-                updated_at = datetime.fromtimestamp(int(match.group(1)))
-                created_at = datetime.fromtimestamp(os.path.getctime(path))
-
-                return updated_at >= created_at
+    def __mod_needs_update(self, mod: ModRecord):
+        if not os.path.isdir(mod.real_path):
+            return False
 
-        return False
+        pending = mod.has_pending_update()
+        if pending is not None:
+            return pending
 
-    def __rename_files_to_lowercase(self, directory_path):
-        if not os.path.exists(directory_path):
-            return
+        if mod.remote_updated is None:
+            return False
 
-        parent_directory = os.path.dirname(directory_path)
-        
-        for root, dirs, files in os.walk(directory_path):
-            for filename in files:
-                old_path = os.path.join(root, filename)
-                new_filename = filename.lower()
-                new_path = os.path.join(root, new_filename)
+        # No installed version recorded yet, trust the directory timestamp once
+        updated_at = datetime.fromtimestamp(mod.remote_updated)
+        created_at = datetime.fromtimestamp(os.path.getctime(mod.real_path))
 
-                os.rename(old_path, new_path)
-                
-                relative_path = os.path.relpath(root, parent_directory)
-                print(f"File renamed: {relative_path}/{filename} -> {new_filename}")
+        if updated_at >= created_at:
+            return True
 
-            for folder in dirs:
-                old_path = os.path.join(root, folder)
-                new_folder = folder.lower()
-                new_path = os.path.join(root, new_folder)
+        mod.mark_installed()
+        return False
 
-                os.rename(old_path, new_path)
+    async def __lowercase_workshop_dir(self, changed_ids):
+        # Only content touched by steamcmd this run (or never normalised) can have uppercase names
+        mods = [mod for mod in self.mod_list.with_status(ModStatus.UPDATED, ModStatus.UP_TO_DATE)
+                if mod.id in changed_ids or not mod.is_normalised()]
 
-                relative_path = os.path.relpath(root, parent_directory)
-                print(f"Folder renamed: {relative_path}/{folder} -> {new_folder}")
+        self.log(f"Normalising {len(mods)} of {len(self.mod_list)} mods")
+        results = await asyncio.gather(*[self.worker.submit(normalise_lowercase, mod.real_path, progress=self.__worker_progress) for mod in mods],
+                                       return_exceptions=True)
 
-    async def __lowercase_workshop_dir(self):
-        for mod in self.mod_list:
-            mod_folder = mod.get("folder")
-            real_path = mod.get("real_path")
-            
-            if self.checkModStatus(mod, ModStatus.UPDATED) or self.checkModStatus(mod, ModStatus.UP_TO_DATE):
-                self.log(f"Convert files to lower for mod {mod_folder}")
-                self.__rename_files_to_lowercase(real_path)
-            else:
-                self.log(f"Skipping folder for mod {mod_folder}")
-
-    async def __create_mod_symlinks(self):
-        for mod in self.mod_list:
-            if not self.checkModStatus(mod, ModStatus.UPDATED) and not self.checkModStatus(mod, ModStatus.UP_TO_DATE):
+        for mod, result in zip(mods, results):
+            if isinstance(result, Exception):
+                self.log(f"Failed to convert files to lower for mod {mod.folder}: {result!r}", LogLevel.ERR)
                 continue
 
-            mod_folder = mod.get("folder")
-            real_path = mod.get("real_path")
-            link_path = mod.get("link_path")
+            renamed, conflicts = result
+            if renamed or conflicts:
+                self.log(f"Converted files to lower for mod {mod.folder}: {renamed} renamed, {conflicts} conflicts")
+            if not conflicts:
+                mod.normalised_updated = mod.installed_updated
 
-            if os.path.isdir(real_path):
-                if not os.path.islink(link_path):
-                    os.symlink(real_path, link_path)
-                    self.log(f"Creating symlink '{link_path}'...")
-            else:
-                self.log(f"Mod '{mod_folder}' does not exist! ({real_path})")
+    async def __reconcile_mod_links(self):
+        mods = self.mod_list.with_status(ModStatus.UPDATED, ModStatus.UP_TO_DATE)
+        (added, removed, changed), _ = await self.worker.submit(reconcile_links, self.links, mods, False, progress=self.__worker_progress)
+        self.log(f"Mod links: {added} added, {removed} removed, {changed} changed")
 
-    async def __copy_keys(self):
-        key_regex = re.compile(r'(key).*', re.I)
+    async def __reconcile_key_links(self, changed_ids):
+        mods = self.mod_list.with_status(ModStatus.UPDATED, ModStatus.UP_TO_DATE)
+        self.links.invalidate(changed_ids)
 
-        # Check for broken symlinks
-        for key in os.listdir(A3_KEYS_DIR):
-            key_path = "{}/{}".format(A3_KEYS_DIR, key)
-            if os.path.islink(key_path) and not os.path.exists(key_path):
-                self.log(f"Removing outdated server key '{key}'")
-                os.unlink(key_path)
+        (added, removed, changed), key_cache = await self.worker.submit(reconcile_links, self.links, mods, True, progress=self.__worker_progress)
+        self.links.update_cache(key_cache)
+        self.log(f"Key links: {added} added, {removed} removed, {changed} changed")
 
-        # Update/add new key symlinks
-        for mod in self.mod_list:
-            if self.checkModStatus(mod, ModStatus.UPDATED) or self.checkModStatus(mod, ModStatus.UP_TO_DATE):
-                continue
-
-            mod_folder = mod.get("folder")
-            real_path = mod.get("real_path")
-            
-            if not os.path.isdir(real_path):
-                self.log(f"Couldn't copy key for mod '{mod_folder}', directory doesn't exist.")
-            else:
-                dirlist = os.listdir(real_path)
-                keyDirs = [x for x in dirlist if re.search(key_regex, x)]
-
-                if keyDirs:
-                    keyDir = keyDirs[0]
-                    if os.path.isfile("{}/{}".format(real_path, keyDir)):
-                        # Key is placed in root directory
-                        key = keyDir
-                        key_path = os.path.join(A3_KEYS_DIR, key)
-                        if not os.path.exists(key_path):
-                            self.log(f"Creating symlink to key for mod '{mod_folder}' ({key})")
-                            os.symlink(os.path.join(real_path, key), key_path)
-                    else:
-                        # Key is in a folder
-                        for key in os.listdir(os.path.join(real_path, keyDir)):
-                            real_key_path = os.path.join(real_path, keyDir, key)
-                            key_path = os.path.join(A3_KEYS_DIR, key)
-                            if not os.path.exists(key_path):
-                                self.log(f"Creating symlink to key for mod '{mod_folder}' ({key})")
-                                os.symlink(real_key_path, key_path)
-                else:
-                    self.log(f"!! Couldn't find key folder for mod {mod_folder} !!")
-                  
-
-    def __update_success(self, modid):
+    def __update_success(self, modid, size=None):
         self.log(f"Downloaded mod {modid}")
                 
         mod = self.findModByID(modid)
         self.setModStatus(mod, ModStatus.UPDATED)
         self.setModEndTime(mod)
+        if size is not None:
+            mod.bytes_total = size
+            mod.bytes_received = size
+        mod.mark_installed()
 
     def __update_error(self, modid, err):
         self.log(f"Failed to download mod {modid}: {err}")
@@ -361,6 +505,7 @@ class ModUpdater(commands.Cog, AppModule):
         
     def __update_timeout(self, modid):
         self.log(f"Failed to download mod {modid}: Timeout")
+        self.__timed_out.add(modid)
 
         mod = self.findModByID(modid)
         self.setModStatus(mod, ModStatus.FAILED)
@@ -372,8 +517,17 @@ class ModUpdater(commands.Cog, AppModule):
         mod = self.findModByID(modid)
         self.setModStatus(mod, ModStatus.IN_PROGRESS)
         self.setModStartTime(mod)
+        mod.end_time = 0
+        mod.bytes_received = 0
+        mod.bytes_total = mod.file_size
 
-    def __validate_success(self, modid):
+    def __update_progress(self, modid, received, total):
+        mod = self.findModByID(modid)
+        if mod:
+            mod.bytes_received = received
+            mod.bytes_total = total
+
+    def __validate_success(self, modid, size=None):
         self.log(f"Validated mod {modid}")
                 
         mod = self.findModByID(modid)
@@ -403,154 +557,511 @@ class ModUpdater(commands.Cog, AppModule):
         else:
             self.setModStatus(mod, ModStatus.VALIDATING_NEW)
             
-    async def run_update(self, ctx, user, passwd):   
-        msg = await self.send(ctx, "Launching a mod update", None)
+    async def run_update(self, ctx, user, passwd, validation=None):
+        if self.__update_lock.locked() or (self.job and self.job.active):
+            raise BotInternalException("A mod update or update check is already running!")
 
-        _mods = [mod.get("id") for mod in self.mod_list]
-        
-        if os.path.exists(A3_WORKSHOP_DIR):
-            for item in os.listdir(A3_WORKSHOP_DIR):
-                item_path = os.path.join(A3_WORKSHOP_DIR, item)
-                if os.path.isdir(item_path) and item not in _mods:
-                    self.log(f"Removing obsolete mod: {item}")
-                    shutil.rmtree(item_path)
-                        
-        self.log("Generating runscript...")
-        if not await self.__generate_steamcmd_runscript(user, passwd):
-            self.log("No update required!")
+        async with self.__update_lock:
+            job = ModJob(validation=validation, channel_id=ctx.channel.id)
+            job.id = await self.__storeJob(job.to_row())
+            self.job = job
+            return await self.__run_job(ctx, job, user, passwd)
+
+    async def __resumeOnReady(self):
+        await self.bot.wait_until_ready()
+
+        try:
+            await self.resumeJob()
+        except Exception as e:
+            self.log(f"Failed to resume mod update job: {e}", LogLevel.ERR)
+
+    async def resumeJob(self):
+        row = await self.__queryActiveJob()
+        if row is None:
             return False
 
-        self.log("Deleting symlinks...")
-        for item in os.listdir(A3_MODS_DIR):
-            itempath = os.path.join(A3_MODS_DIR, item)
-        
-            if os.path.islink(itempath):
-                self.log(f"Remove link {itempath}")
-                os.unlink(itempath)
-        
-        self.log("Updating mods...")
-        main_task = self.__run_steamcmd(MAIN_RUNSCRIPT_PATH, self.__update_success, self.__update_error, self.__update_timeout, self.__update_start)
-        
-        while not main_task.done():
-            text = f"Mod update status (UPDATING)\n```{self.__generate_mod_list()}```";
-            
-            try:
-                await self.edit(msg, text, None)
-            except:
-                await msg.delete()
-                msg = await self.send(ctx, text, None)
-                
-            await asyncio.sleep(10)
-            
-        await main_task
-        
-        validate_task = self.__run_steamcmd(VALIDATE_RUNSCRIPT_PATH, self.__validate_success, self.__validate_error, self.__validate_timeout, self.__validate_start)
-        
-        while not validate_task.done():
-            text = f"Mod update status (VALIDATING)\n```{self.__generate_mod_list()}```";
+        job = ModJob.from_row(row)
+        ctx = self.bot.channelContext(job.channel_id)
+        if ctx is None:
+            self.log(f"Can't resume mod update job {job.id}, channel {job.channel_id} not found", LogLevel.ERR)
+            job.finish(JobState.FAILED, f"Channel {job.channel_id} not found on resume")
+            await self.__storeJob(job.to_row(), job.id)
+            return False
+
+        self.log(f"Resuming mod update job {job.id} after phase {job.phase}")
+        self.__prepareResume(job)
+
+        async with self.__update_lock:
+            self.job = job
+            return await self.__run_job(ctx, job, self.settings["steam_user"], self.settings["steam_password"])
+
+    def __prepareResume(self, job):
+        # Statuses of steps interrupted by the restart are rolled back to their phase start
+        for mod in self.mod_list.with_status(ModStatus.IN_PROGRESS):
+            self.setModStatus(mod, ModStatus.IN_QUEUE)
+        for mod in self.mod_list.with_status(ModStatus.VALIDATING):
+            self.setModStatus(mod, ModStatus.WAIT_VALIDATION)
+        for mod in self.mod_list.with_status(ModStatus.VALIDATING_NEW):
+            self.setModStatus(mod, ModStatus.UPDATED)
+
+        for mod in self.mod_list.with_status(ModStatus.UPDATED):
+            if mod.has_pending_update():
+                mod.mark_installed()
+
+    async def cancelJob(self):
+        if self.job is None or not self.job.active or self.__job_task is None:
+            return False
+
+        self.__job_cancelled = True
+        self.__job_task.cancel()
+        return True
+
+    async def __run_job(self, ctx, job, user, passwd):
+        self.__job_cancelled = False
+        self.__job_task = asyncio.ensure_future(self.__run_phases(ctx, job, user, passwd))
+
+        try:
+            return await asyncio.shield(self.__job_task)
+        except asyncio.CancelledError:
+            if not self.__job_cancelled:
+                raise
+
+            job.finish(JobState.CANCELLED)
+            await self.send(ctx, f"Mod update job {job.id} cancelled after phase {job.phase}", None)
+            return False
+        except Exception as e:
+            job.finish(JobState.FAILED, str(e))
+            raise
+        finally:
+            await self.flushModStatus()
+            await self.saveWorkshopCache()
+
+            if not job.active:
+                await self.__storeJob(job.to_row(), job.id)
+                await self.__saveHistory(job)
+                self.__clean()
+
+    async def __checkpoint(self, job, phase):
+        await self.flushModStatus()
+        await self.saveWorkshopCache()
+
+        job.checkpoint(phase)
+        await self.__storeJob(job.to_row(), job.id)
+        self.log(f"Mod update job {job.id}: phase {phase} finished")
+
+    async def __show_progress(self, ctx, task, title, eta=False):
+        try:
+            await self.__poll_progress(ctx, task, title, eta)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+
+        await task
+
+    async def __poll_progress(self, ctx, task, title, eta):
+        while not task.done():
+            summary = f"[{self.__generate_status_summary()}] {self.__generate_download_eta()}" if eta else f"[{self.__generate_status_summary()}]"
+            text = f"Mod update status ({title}) {summary}\n```{self.__generate_mod_list()}```"
             
             try:
-                await self.edit(msg, text, None)
+                await self.edit(self.__progress_msg, text, None)
             except:
-                await msg.delete()
-                msg = await self.send(ctx, text, None)
+                await self.__progress_msg.delete()
+                self.__progress_msg = await self.send(ctx, text, None)
                 
             await asyncio.sleep(10)
-        
-        await validate_task
-        
-        await msg.delete()
-        await self.send(ctx, f"Mod update status (DONE)\n```{self.__generate_mod_list()}```", None)
-        
-        self.log("Converting uppercase files/folders to lowercase...")
-        await self.__lowercase_workshop_dir()
-        self.log("Creating symlinks...")
-        await self.__create_mod_symlinks()
-        self.log("Copying server keys...")
-        await self.__copy_keys()
-        self.log("Clean...")
-        self.__clean()
+
+    async def __run_phases(self, ctx, job, user, passwd):
+        self.__progress_msg = await self.send(ctx, f"{'Resuming' if job.phase else 'Launching'} mod update job {job.id}", None)
+
+        for phase in job.remaining_phases():
+            if phase == "plan":
+                if os.path.exists(A3_WORKSHOP_DIR):
+                    for item in os.listdir(A3_WORKSHOP_DIR):
+                        item_path = os.path.join(A3_WORKSHOP_DIR, item)
+                        if os.path.isdir(item_path) and item not in self.mod_list:
+                            self.log(f"Removing obsolete mod: {item}")
+                            await self.worker.submit(remove_tree, item_path, progress=self.__worker_progress)
+
+                self.log("Planning the update...")
+                for mod in self.mod_list:
+                    mod.reset_progress()
+                job.validate_ids = await self.__plan_update(job.validation)
+
+                if not job.validate_ids and not self.mod_list.count(ModStatus.IN_QUEUE):
+                    self.log("No update required!")
+                    job.finish(JobState.DONE)
+                    await self.edit(self.__progress_msg, "No mod update required", None)
+                    return False
+
+            elif phase == "download":
+                self.log("Updating mods...")
+                self.__download_started = time.monotonic()
+                await self.__show_progress(ctx, asyncio.ensure_future(self.__run_downloads(user, passwd)), "UPDATING", True)
+
+            elif phase == "validate":
+                if job.validate_ids:
+                    self.__write_runscript(VALIDATE_RUNSCRIPT_PATH, user, passwd, job.validate_ids)
+                    validate_task = self.__run_steamcmd(VALIDATE_RUNSCRIPT_PATH, self.__validate_success, self.__validate_error, self.__validate_timeout, self.__validate_start)
+                    await self.__show_progress(ctx, validate_task, "VALIDATING")
+
+                await self.__progress_msg.delete()
+                await self.send(ctx, f"Mod update status (DONE) [{self.__generate_status_summary()}]\n```{self.__generate_mod_list()}```", None)
+
+            elif phase == "normalise":
+                self.log("Converting uppercase files/folders to lowercase...")
+                changed = self.__changed_ids(job)
+                await self.__lowercase_workshop_dir(changed)
+                self.log("Saving local file manifests...")
+                await asyncio.to_thread(self.__save_manifests, changed)
+
+            elif phase == "link":
+                self.log("Reconciling mod links...")
+                await self.__reconcile_mod_links()
+
+            elif phase == "keys":
+                self.log("Reconciling key links...")
+                await self.__reconcile_key_links(self.__changed_ids(job))
+
+            await self.__checkpoint(job, phase)
+
+        job.finish(JobState.DONE)
         return True
 
+    def __worker_progress(self, message, data):
+        self.log(f"Worker: {message}")
+
+    def __changed_ids(self, job):
+        # Mods downloaded or successfully validated by this job
+        validated = {mod_id for mod_id in job.validate_ids if mod_id in self.mod_list and not self.checkModStatus(self.findModByID(mod_id), ModStatus.FAILED)}
+        return validated.union(mod.id for mod in self.mod_list.with_status(ModStatus.UPDATED))
+
+    @asessioned
+    def __storeJob(self, session, row, job_id=None):
+        table = ModUpdateJob.__table__
+
+        if job_id is None:
+            job_id = session.execute(sa.insert(table).values(**row)).inserted_primary_key[0]
+        else:
+            session.execute(sa.update(table).where(table.c.id == job_id).values(**row))
+
+        session.commit()
+        return job_id
+
+    async def __loadHistory(self):
+        try:
+            rows = await self.__queryHistory(self.history.depth)
+        except Exception as e:
+            self.log(f"Failed to load mod update history: {e}", LogLevel.ERR)
+            return
+
+        for row in rows:
+            self.history.add(row["mod_id"], row["duration"], row["bytes"], row["outcome"])
+
+    async def __saveHistory(self, job):
+        rows = []
+        for mod in self.mod_list:
+            if not mod.start_time or not mod.end_time:
+                continue
+
+            outcome = "TIMEOUT" if mod.id in self.__timed_out else mod.status.name
+            rows.append({
+                "job_id":       job.id,
+                "mod_id":       mod.id,
+                "started_at":   mod.start_time // 1000000000,
+                "duration":     mod.took,
+                "bytes":        mod.bytes_received or mod.file_size,
+                "outcome":      outcome,
+            })
+            self.history.add(mod.id, mod.took, mod.bytes_received or mod.file_size, outcome)
+
+        if not rows:
+            return
+
+        try:
+            await self.__storeHistory(rows)
+        except Exception as e:
+            self.log(f"Failed to save mod update history: {e}", LogLevel.ERR)
+
+    @asessioned
+    def __storeHistory(self, session, rows):
+        session.execute(sa.insert(ModUpdateHistory.__table__), rows)
+        session.commit()
+
+    @asessioned
+    def __queryHistory(self, session, depth):
+        table = ModUpdateHistory.__table__
+        newer = table.alias("newer")
+
+        # Newest runs per mod, so often updated mods don't push out the history of the rest.
+        # A correlated count instead of a window function keeps it working on older MySQL servers
+        newer_runs = (sa.select(sa.func.count())
+                        .where(newer.c.mod_id == table.c.mod_id, newer.c.id > table.c.id)
+                        .scalar_subquery())
+
+        rows = session.execute(sa.select(table).where(newer_runs < depth).order_by(table.c.id)).mappings().all()
+        return [dict(row) for row in rows]
+
+    @asessioned
+    def __queryLastJob(self, session):
+        job = session.query(ModUpdateJob).order_by(ModUpdateJob.id.desc()).first()
+        return job.to_dict() if job else None
+
+    @asessioned
+    def __queryActiveJob(self, session):
+        job = (session.query(ModUpdateJob)
+                      .filter_by(state=JobState.ACTIVE.value)
+                      .order_by(ModUpdateJob.id.desc())
+                      .first())
+        return job.to_dict() if job else None
+
+#--------------------------------------------------------------#
+#                       UPDATE WATCHER                         #
+#--------------------------------------------------------------#
+    @tasks.loop(minutes=5)
+    async def watch_updates(self):
+        if self.__maintenance_pending and self.__inMaintenanceWindow():
+            await self.__maintenanceUpdate()
+            return
+
+        if time.monotonic() - self.__last_watch < self.__watch_interval:
+            return
+
+        if self.__update_lock.locked():
+            self.log("Previous mod update or check is still running, skipping the scheduled check")
+            return
+
+        self.__last_watch = time.monotonic()
+        try:
+            async with self.__update_lock:
+                pending = await self.checkPendingUpdates()
+        except Exception as e:
+            self.log(f"Scheduled mod update check failed: {e}", LogLevel.ERR)
+            return
+
+        announced = frozenset((mod.id, mod.remote_updated) for mod in pending)
+        if not pending or announced == self.__announced_updates:
+            return
+
+        self.__announced_updates = announced
+        self.__maintenance_pending = bool(self.settings.get("mod_maintenance_window"))
+        await self.__announceUpdates(pending)
+
+    @watch_updates.before_loop
+    async def before_watch_updates(self):
+        await self.bot.wait_until_ready()
+
+    async def checkPendingUpdates(self):
+        await self.refreshWorkshopInfo()
+        await self.saveWorkshopCache()
+        return [mod for mod in self.mod_list if mod.has_pending_update()]
+
+    async def __announceUpdates(self, pending):
+        ctx = self.bot.channelContext(self.settings.get("mod_watch_channel_id"))
+        if ctx is None:
+            self.log("Can't find a channel for mod update announcements", LogLevel.WARN)
+            return
+
+        details = '\n'.join(f"{mod.folder} ({mod.id}): workshop {datetime.fromtimestamp(mod.remote_updated):%Y-%m-%d %H:%M}" for mod in pending)
+        text = f"{len(pending)} mods have pending workshop updates"
+
+        if self.__maintenance_pending:
+            window = self.settings["mod_maintenance_window"]
+            text += f", the update is scheduled for the maintenance window {window['start']}-{window['end']}"
+
+        await self.send(ctx, f"{text}\n```{details}```", None)
+
+    def __inMaintenanceWindow(self, now=None):
+        window = self.settings.get("mod_maintenance_window")
+        if not window:
+            return False
+
+        now = (now if now else datetime.now()).time()
+        start = datetime.strptime(window["start"], "%H:%M").time()
+        end = datetime.strptime(window["end"], "%H:%M").time()
+
+        if start <= end:
+            return start <= now < end
+        return now >= start or now < end
+
+    async def __maintenanceUpdate(self):
+        ctx = self.bot.channelContext(self.settings.get("mod_watch_channel_id"))
+        if ctx is None or self.__update_lock.locked():
+            return
+
+        self.__maintenance_pending = False
+        self.__announced_updates = None
+        enabled = not self.bot.isMaintenanceMode()
+        if enabled:
+            self.bot.toggleMaintenanceMode()
+
+        self.log("Starting scheduled mod update")
+        try:
+            updated = await self.run_update(ctx, self.settings["steam_user"], self.settings["steam_password"])
+
+            restarter = self.app.modules.get("ServerRestarter")
+            if updated and restarter:
+                await restarter.restartServer()
+        except Exception as e:
+            self.log(f"Scheduled mod update failed: {e}", LogLevel.ERR)
+        finally:
+            if enabled:
+                self.bot.toggleMaintenanceMode()
+
 #--------------------------------------------------------------#
 #                           MISC                               #
 #--------------------------------------------------------------#
     
-    def __getModByID(self, session, mod_id):
-        return session.query(Mod).filter_by(mod_id=mod_id).first()
-    
-    @sessioned
-    def __setModStatus(self, session, mod_id, status):
-        mod = self.__getModByID(session, mod_id)
+    @asessioned
+    def __setModStatuses(self, session, statuses):
+        mapping = {mod_id: status.value for mod_id, status in statuses.items()}
 
-        if mod:
-            mod.status = status.value
-            session.commit()
-            
-    @sessioned
-    def __loadModList(self, session):
-        mods = session.query(Mod).all()
-        
-        for mod in mods:
-            self.addMod(mod.folder_name, mod.mod_id, ModStatus(mod.status))
+        session.execute(sa.update(Mod)
+                        .where(Mod.mod_id.in_(list(mapping)))
+                        .values(status=sa.case(mapping, value=Mod.mod_id))
+                        .execution_options(synchronize_session=False))
+        session.commit()
 
-    @sessioned
-    def __addMod(self, session, folder_name, mod_id):    
-        mod = self.__getModByID(session, mod_id)
+    async def flushModStatus(self):
+        # Flushes are serialised so an older batch never overwrites a newer one
+        async with self.__status_flush_lock:
+            if not self.__pending_status:
+                return
 
-        if not mod:
-            mod = Mod(folder_name=folder_name, mod_id=mod_id)
-            session.add(mod)
-            session.commit()
-    
-    def __cleanTable(self):
-        table = self.db.getTable(Mod.__tablename__)
-        table.delete()
+            statuses, self.__pending_status = self.__pending_status, {}
+
+            try:
+                await self.__setModStatuses(statuses)
+                self.log(f"Flushed {len(statuses)} mod status changes", LogLevel.DEBUG)
+            except Exception as e:
+                self.log(f"Failed to flush mod statuses: {e}", LogLevel.ERR)
+                for mod_id, status in statuses.items():
+                    self.__pending_status.setdefault(mod_id, status)
+
+    @to_task
+    async def __delayedStatusFlush(self):
+        await asyncio.sleep(self.__status_flush_interval)
+        await self.flushModStatus()
+
+    @asessioned
+    def __queryModList(self, session):
+        return [mod.to_dict() for mod in session.query(Mod).all()]
+
+    async def __loadModList(self):
+        self.mod_list.clear()
+
+        for row in await self.__queryModList():
+            mod = self.addMod(row["folder_name"], row["mod_id"], ModStatus(row["status"]))
+            mod.installed_updated = row["installed_updated"]
+            mod.installed_size = row["installed_size"]
+            mod.installed_manifest = row["manifest_id"]
+            mod.remote_updated = row["remote_updated"]
+            mod.checked_at = row["checked_at"]
+            mod.normalised_updated = row["normalised_updated"]
+
+    @asessioned
+    def __setWorkshopCache(self, session, rows):
+        table = Mod.__table__
+
+        # Core statement with a parameter list runs as a single executemany
+        session.execute(sa.update(table)
+                        .where(table.c.mod_id == sa.bindparam("b_mod_id"))
+                        .values(installed_updated=sa.bindparam("b_installed_updated"),
+                                installed_size=sa.bindparam("b_installed_size"),
+                                manifest_id=sa.bindparam("b_manifest_id"),
+                                remote_updated=sa.bindparam("b_remote_updated"),
+                                checked_at=sa.bindparam("b_checked_at"),
+                                normalised_updated=sa.bindparam("b_normalised_updated")), rows)
+        session.commit()
+
+    async def saveWorkshopCache(self):
+        rows = [{
+            "b_mod_id":             mod.id,
+            "b_installed_updated":  mod.installed_updated,
+            "b_installed_size":     mod.installed_size,
+            "b_manifest_id":        mod.installed_manifest,
+            "b_remote_updated":     mod.remote_updated,
+            "b_checked_at":         mod.checked_at,
+            "b_normalised_updated": mod.normalised_updated,
+        } for mod in self.mod_list]
+
+        if not rows:
+            return
+
+        try:
+            await self.__setWorkshopCache(rows)
+        except Exception as e:
+            self.log(f"Failed to save workshop cache: {e}", LogLevel.ERR)
+
+    @asessioned
+    def __applyPreset(self, session, added, removed, renamed):
+        table = Mod.__table__
+
+        if removed:
+            session.execute(sa.delete(table).where(table.c.mod_id.in_(removed)))
+
+        if renamed:
+            session.execute(sa.update(table)
+                            .where(table.c.mod_id == sa.bindparam("b_mod_id"))
+                            .values(folder_name=sa.bindparam("b_folder_name")),
+                            [{"b_mod_id": mod_id, "b_folder_name": folder} for mod_id, folder in renamed.items()])
+
+        if added:
+            session.execute(sa.insert(table),
+                            [{"mod_id": mod_id, "folder_name": folder, "status": ModStatus.UNKNOWN.value} for mod_id, folder in added.items()])
+
+        session.commit()
     
+    def __generate_status_summary(self):
+        return ', '.join(f"{status.name}: {count}" for status, count in self.mod_list.counts().items())
+
+    def __generate_download_eta(self):
+        active = self.mod_list.with_status(ModStatus.IN_QUEUE, ModStatus.IN_PROGRESS)
+        remaining = sum(max((mod.bytes_total or mod.file_size or 0) - mod.bytes_received, 0) for mod in active)
+        received = sum(mod.bytes_received for mod in self.mod_list.with_status(ModStatus.UPDATED, ModStatus.IN_PROGRESS))
+        elapsed = time.monotonic() - self.__download_started
+
+        if not received or not elapsed:
+            predicted = max(self.__predicted_download - elapsed, 0)
+            return f"predicted {int(predicted // 60)} min {int(predicted % 60)} s" if self.__predicted_download else "ETA unknown"
+
+        rate = received / elapsed
+        return f"{rate / 1048576:.1f} MB/s, {remaining / 1048576:.0f} MB left, ETA {int(remaining / rate // 60)} min {int(remaining / rate % 60)} s"
+
+    def __generate_mod_line(self, mod: ModRecord):
+        line = "[{}] {} (took {:.2f} s)".format(mod.status.name, mod.id, mod.took)
+
+        if mod.bytes_received and mod.status in (ModStatus.IN_PROGRESS, ModStatus.UPDATED):
+            total = f"/{mod.bytes_total / 1048576:.1f}" if mod.bytes_total else ""
+            line += " {:.1f}{} MB, {:.2f} MB/s".format(mod.bytes_received / 1048576, total, mod.throughput / 1048576)
+
+        return line
+
     def __generate_mod_list(self):
-        # return '\n'.join("[{}] {} ({}, took {:.2f} s)".format(mod.get("status")._name_, mod.get("folder"), mod.get("id"), self.getModTook(mod)) for mod in self.mod_list)
-        return '\n'.join("[{}] {} (took {:.2f} s)".format(mod.get("status")._name_, mod.get("id"), self.getModTook(mod)) for mod in self.mod_list)
+        return '\n'.join(self.__generate_mod_line(mod) for mod in self.mod_list)
         
     def addMod(self, mod_folder, mod_id, status = ModStatus.UNKNOWN):
         self.log(f"Adding mod {mod_folder} ({mod_id})")
-        self.mod_list.append({ 
-            "folder": mod_folder, 
-            "id": mod_id,
-            "real_path": "{}/{}".format(A3_WORKSHOP_DIR, mod_id),
-            "link_path": "{}/{}".format(A3_MODS_DIR, mod_folder),
-            "start_time": 0,
-            "end_time": 0,
-            "status": status
-        })
+        return self.mod_list.add(mod_folder, mod_id, status)
         
-    def checkModStatus(self, mod, status):
-        return mod.get("status") == status
+    def checkModStatus(self, mod: ModRecord, status):
+        return mod.status == status
 
-    def setModStatus(self, mod, status):
-        mod["status"] = status
-        mod_id = mod.get("id")
-        self.__setModStatus(mod_id, status)
+    def setModStatus(self, mod: ModRecord, status):
+        self.mod_list.set_status(mod, status)
+        self.__pending_status[mod.id] = status
 
-    def setModStartTime(self, mod):
-        mod["start_time"] = time.time_ns()
-        
-    def setModEndTime(self, mod):
-        mod["end_time"] = time.time_ns()
-        
-    def getModTook(self, mod):
-        start_time = mod["start_time"]
-        end_time = mod["end_time"]
-        
-        if start_time == 0:
-            return 0
+        if self.__status_flush_task is None or self.__status_flush_task.done():
+            self.__status_flush_task = self.__delayedStatusFlush()
+
+    def setModStartTime(self, mod: ModRecord):
+        mod.start_time = time.time_ns()
         
-        if end_time == 0:
-            end_time = time.time_ns()
+    def setModEndTime(self, mod: ModRecord):
+        mod.end_time = time.time_ns()
         
-        return (end_time - start_time) / 1000000000
+    def getModTook(self, mod: ModRecord):
+        return mod.took
         
     def findModByID(self, id):
-        for mod in self.mod_list:
-            if mod.get("id") == id:
-                return mod
-        return None
\ No newline at end of file
+        return self.mod_list.get(id)
@@ -0,0 +1,60 @@
+import re
+
+from html.parser import HTMLParser
+
+FOLDER_PATTERN = re.compile(r'\W+')
+
+def preset_folder_name(display_name):
+    if display_name.startswith('@'):
+        return display_name
+    return f"@{FOLDER_PATTERN.sub('_', display_name).lower()}"
+
+class PresetParser(HTMLParser):
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.mods = {}
+
+        self.__in_row = False
+        self.__in_name = False
+        self.__name = []
+        self.__link = None
+
+    def handle_starttag(self, tag, attrs):
+        data_type = dict(attrs).get("data-type")
+
+        if tag == "tr" and data_type == "ModContainer":
+            self.__in_row = True
+            self.__name = []
+            self.__link = None
+        elif self.__in_row and tag == "td" and data_type == "DisplayName":
+            self.__in_name = True
+        elif self.__in_row and tag == "a" and data_type == "Link":
+            self.__link = dict(attrs).get("href")
+
+    def handle_endtag(self, tag):
+        if tag == "td":
+            self.__in_name = False
+        elif tag == "tr" and self.__in_row:
+            self.__in_row = False
+            self.__add_row()
+
+    def handle_data(self, data):
+        if self.__in_name:
+            self.__name.append(data)
+
+    def __add_row(self):
+        name = "".join(self.__name).strip()
+        if not name or not self.__link:
+            return
+
+        mod_id = self.__link.split('=')[-1]
+        # The first entry wins if a preset lists the same item twice
+        self.mods.setdefault(mod_id, preset_folder_name(name))
+
+def parse_preset(text, chunk_size=65536):
+    parser = PresetParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i:i + chunk_size])
+    parser.close()
+    return parser.mods
@@ -1,4 +1,5 @@
 import re
+import asyncio
 
 from typing import Union
 from enum import Enum
@@ -8,7 +9,7 @@ import discord
 from discord.ext import commands
 
 from app import AppModule
-from utils import LogLevel, BotInternalException, sessioned
+from utils import LogLevel, BotInternalException, asessioned, TTLCache
 from db import Admin
 
 class PrivSystemLevels(Enum):
@@ -22,6 +23,8 @@ class PrivSystem(commands.Cog, AppModule):
     def __init__(self, app):
         super(PrivSystem, self).__init__(app)
         self.priv_levels = list(PrivSystemLevels)
+        self.priv_cache = TTLCache(self.settings.get("priv_cache_size", 1024),
+                                   self.settings.get("priv_cache_ttl", 300))
 
     def getAdminByUID(self, session, uid):
         return session.query(Admin).filter_by(uid=uid).first()
@@ -34,33 +37,49 @@ class PrivSystem(commands.Cog, AppModule):
             if not admin:
                 admin = Admin(uid=uid, priv_level=PrivSystemLevels.USER.value)
                 session.add(admin)
-                session.commit()
 
             return func(self, session, uid, admin, *args, **kwargs)
         return wrapper
 
-    @sessioned
-    @admined
-    def checkPriv(self, session, uid, admin, priv_level : PrivSystemLevels):
-        return PrivSystemLevels(admin.priv_level).value <= priv_level.value
+    @asessioned
+    def __loadPriv(self, session, uid):
+        admin = self.getAdminByUID(session, uid)
+
+        # Unknown users are plain users, no need to store them
+        if not admin:
+            return PrivSystemLevels.USER
 
-    @sessioned
-    @admined
-    def getPriv(self, session, uid, admin):
         return PrivSystemLevels(admin.priv_level)
 
-    @sessioned
+    async def checkPriv(self, uid, priv_level : PrivSystemLevels):
+        return (await self.getPriv(uid)).value <= priv_level.value
+
+    async def getPriv(self, uid):
+        uid = str(uid)
+        level = self.priv_cache.get(uid)
+
+        if level is None:
+            level = await self.__loadPriv(uid)
+            self.priv_cache.set(uid, level)
+
+        return level
+
+    @asessioned
     @admined
-    def setPriv(self, session, uid, admin, priv_level : PrivSystemLevels):
+    def __storePriv(self, session, uid, admin, priv_level : PrivSystemLevels):
         admin.priv_level = priv_level.value
         session.commit()
 
+    async def setPriv(self, uid, priv_level : PrivSystemLevels):
+        await self.__storePriv(uid, priv_level)
+        self.priv_cache.set(str(uid), priv_level)
+
     def withPriv(level : PrivSystemLevels, send_error=True):
         def decorator(func):
             @wraps(func)
             async def wrapper(self, ctx: commands.Context, *args, **kwargs):
                 priv_system = self.bot.get_cog('PrivSystem')
-                if priv_system.checkPriv(ctx.author.id, level):
+                if await priv_system.checkPriv(ctx.author.id, level):
                     return await func(self, ctx, *args, **kwargs)
                 elif (send_error):
                     await self.send(ctx, f"This command can only be executed by users with {level.name} privileges or higher")
@@ -96,15 +115,21 @@ class PrivSystem(commands.Cog, AppModule):
     @withPriv(PrivSystemLevels.USER)
     async def getMyPrivLevel(self, ctx: commands.Context):
         user_id = ctx.author.id
-        level = self.getPriv(user_id)
+        level = await self.getPriv(user_id)
         await self.send(ctx, f"Your privilege level is {level.name}")
 
     @priv.command(name="get")
     @withPriv(PrivSystemLevels.USER)
     async def getPrivLevel(self, ctx: commands.Context, mention : Union[discord.User, discord.Member]):
-        level = self.getPriv(mention.id)
+        level = await self.getPriv(mention.id)
         await self.send(ctx, f"{mention.display_name} privilege level is {level.name}")
 
+    @priv.command(name="cache")
+    @withPriv(PrivSystemLevels.OWNER)
+    async def privCacheStats(self, ctx: commands.Context):
+        stats = '\n'.join(f"{name:10}: {value}" for name, value in self.priv_cache.stats().items())
+        await self.send(ctx, f"Privilege cache\n```{stats}```")
+
     @priv.command(name="set")
     @withPriv(PrivSystemLevels.OWNER)
     async def setPrivLevel(self, ctx: commands.Context, mention : Union[discord.User, discord.Member, discord.Role], level : str):
@@ -142,16 +167,16 @@ class PrivSystem(commands.Cog, AppModule):
             if not allow_roles:
                 raise BotInternalException("Role mentions are not available for this command, use user mentions.")
             
-            for member in mention.members:
-                await self.process_user(ctx, member, get_level, success_func, fail_func)
+            # Replies are queued together so the outbox can batch them
+            await asyncio.gather(*[self.process_user(ctx, member, get_level, success_func, fail_func) for member in mention.members])
 
     async def process_user(self, ctx: commands.Context, mention : Union[discord.User, discord.Member], get_level, success_func, fail_func):
         self.log(f"process_user: {mention.id} {mention.display_name}")
-        current_level = self.getPriv(mention.id)
+        current_level = await self.getPriv(mention.id)
         requested_level = get_level(current_level)
 
         if (current_level != requested_level):
-            self.setPriv(mention.id, requested_level)
+            await self.setPriv(mention.id, requested_level)
             text = success_func(mention, current_level, requested_level)
             await self.send(ctx, text)
         else:
@@ -5,6 +5,7 @@ from discord.ext import commands
 from app import AppModule
 from utils import LogLevel, BotInternalException
 from .priv_system import PrivSystem, PrivSystemLevels
+from .worker_jobs import run_script
 
 class ServerRestarter(commands.Cog, AppModule):
     def __init__(self, app):
@@ -15,10 +16,16 @@ class ServerRestarter(commands.Cog, AppModule):
     async def restart(self, ctx: commands.Context):
         msg = await self.send(ctx, "Initiating a reboot")
         try:
-            self.bot.setRebootState()
-            out = subprocess.run("bash restart.sh", check=True, text=True, capture_output=True, shell=True)
-            self.log(f"\n{out}")
+            await self.restartServer()
+        except subprocess.CalledProcessError:
+            await msg.delete()
+            raise BotInternalException("Error when trying to reboot, you need to do restart manually!")
+
+    async def restartServer(self):
+        self.bot.setRebootState()
+        try:
+            returncode, stdout, stderr = await self.worker.submit(run_script, "bash restart.sh")
+            self.log(f"\n{stdout}{stderr}")
         except subprocess.CalledProcessError as e:
             self.log(e, LogLevel.WARN)
-            await msg.delete()
-            raise BotInternalException("Error when trying to reboot, you need to do restart manually!")
\ No newline at end of file
+            raise
\ No newline at end of file
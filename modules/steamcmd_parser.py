@@ -0,0 +1,103 @@
+import re
+import codecs
+
+ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]|\x1b[^m]*m')
+LINE_PATTERN = re.compile(
+    r'workshop_download_item \d+ (?P<start>\d+)'
+    r'|Success\. Downloaded item (?P<success>\d+)(?:.*?\((?P<success_bytes>\d+) bytes\))?'
+    r'|ERROR! Timeout downloading item (?P<timeout>\d+)'
+    r'|ERROR! Download item (?P<error>\d+) failed \((?P<error_reason>[^)]+)\)'
+    r'|progress: (?P<percent>[\d.]+) \((?P<received>\d+) / (?P<total>\d+)\)'
+)
+
+class SteamCmdEvent:
+    __slots__ = ("mod_id",)
+
+    def __init__(self, mod_id):
+        self.mod_id = mod_id
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for cls in type(self).__mro__ for name in getattr(cls, "__slots__", ()))
+        return f"{type(self).__name__}({fields})"
+
+class StartEvent(SteamCmdEvent):
+    __slots__ = ()
+
+class SuccessEvent(SteamCmdEvent):
+    __slots__ = ("size",)
+
+    def __init__(self, mod_id, size=None):
+        super().__init__(mod_id)
+        self.size = size
+
+class TimeoutEvent(SteamCmdEvent):
+    __slots__ = ()
+
+class ErrorEvent(SteamCmdEvent):
+    __slots__ = ("reason",)
+
+    def __init__(self, mod_id, reason):
+        super().__init__(mod_id)
+        self.reason = reason
+
+class ProgressEvent(SteamCmdEvent):
+    __slots__ = ("received", "total")
+
+    def __init__(self, mod_id, received, total):
+        super().__init__(mod_id)
+        self.received = received
+        self.total = total
+
+class SteamCmdParser:
+
+    def __init__(self):
+        self.current = None
+        self.__buffer = ""
+        self.__decoder = codecs.getincrementaldecoder('utf8')(errors='replace')
+
+    def feed(self, data: bytes):
+        # Progress lines end with \r and are rewritten in place, treat it as a line break
+        text = self.__buffer + self.__decoder.decode(data)
+        lines = re.split(r'\r\n|\r|\n', text)
+        self.__buffer = lines.pop()
+
+        events = []
+        for line in lines:
+            event = self.parse_line(line)
+            if event:
+                events.append(event)
+        return events
+
+    def close(self):
+        line, self.__buffer = self.__buffer + self.__decoder.decode(b'', final=True), ""
+        event = self.parse_line(line)
+        return [event] if event else []
+
+    def parse_line(self, line: str):
+        if not line:
+            return None
+
+        match = LINE_PATTERN.search(ESCAPE_PATTERN.sub('', line))
+        if not match:
+            return None
+
+        groups = match.groupdict()
+
+        if groups["start"]:
+            self.current = groups["start"]
+            return StartEvent(self.current)
+
+        if groups["success"]:
+            size = int(groups["success_bytes"]) if groups["success_bytes"] else None
+            return SuccessEvent(groups["success"], size)
+
+        if groups["timeout"]:
+            return TimeoutEvent(groups["timeout"])
+
+        if groups["error"]:
+            return ErrorEvent(groups["error"], groups["error_reason"])
+
+        if self.current:
+            return ProgressEvent(self.current, int(groups["received"]), int(groups["total"]))
+
+        return None
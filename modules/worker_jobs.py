@@ -0,0 +1,49 @@
+import os
+import shutil
+import subprocess
+
+from utils import PBOManipulator, LowercaseNormaliser
+from utils.worker import report_progress
+from .mod_links import ModLinkReconciler
+
+# Everything here runs in a JobWorker process, arguments and results must be picklable
+
+def remove_tree(path):
+    report_progress(f"Removing {path}")
+    shutil.rmtree(path)
+
+def normalise_lowercase(root):
+    renamed, conflicts = LowercaseNormaliser().normalise(root)
+    report_progress(f"Normalised {root}", renamed=renamed, conflicts=conflicts)
+    return renamed, conflicts
+
+def reconcile_links(reconciler: ModLinkReconciler, mods, keys):
+    if keys:
+        report_progress("Reconciling key links", mods=len(mods))
+        result = reconciler.reconcile_keys(mods)
+    else:
+        report_progress("Reconciling mod links", mods=len(mods))
+        result = reconciler.reconcile_mods(mods)
+
+    # The key locations found here are cached by the caller
+    return result, reconciler.key_cache
+
+def unpack_mission(mission_file, mission_path):
+    pbo = PBOManipulator(mission_file, mission_path)
+    pbo.clean()
+    report_progress(f"Unpacking {mission_file}")
+    pbo.unpack()
+    report_progress(f"Unpacked {len(pbo.files)} files", files=len(pbo.files))
+
+def pack_mission(mission_file, mission_path):
+    pbo = PBOManipulator(mission_file, mission_path)
+    pbo.update()
+    report_progress(f"Packing {len(pbo.files)} files", files=len(pbo.files))
+    pbo.pack()
+    pbo.clean()
+    report_progress(f"Packed {mission_file}", size=os.path.getsize(f"{mission_path}/{mission_file}"))
+
+def run_script(command):
+    report_progress(f"Running {command}")
+    out = subprocess.run(command, check=True, text=True, capture_output=True, shell=True)
+    return out.returncode, out.stdout, out.stderr
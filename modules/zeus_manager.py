@@ -2,7 +2,7 @@ import discord
 from discord.ext import commands
 
 from app import App, AppModule
-from utils import LogLevel, BotInternalException, sessioned
+from utils import LogLevel, BotInternalException, asessioned
 from .priv_system import PrivSystem, PrivSystemLevels
 from db import ZeusUser
 
@@ -13,11 +13,11 @@ class ZeusManager(commands.Cog, AppModule):
     def getZeusUserBySteamID(self, session, steamid):
         return session.query(ZeusUser).filter_by(steamid=steamid).first()
     
-    @sessioned
+    @asessioned
     def getAllZeusUsers(self, session):
         return session.query(ZeusUser).all()
     
-    @sessioned
+    @asessioned
     def addZeusUser(self, session, nickname, steamid):
         user = self.getZeusUserBySteamID(session, steamid)
 
@@ -29,7 +29,7 @@ class ZeusManager(commands.Cog, AppModule):
             return (user.nickname, user.steamid, user.is_zeus)
         return None
 
-    @sessioned
+    @asessioned
     def delZeusUser(self, session, steamid):
         user = self.getZeusUserBySteamID(session, steamid)
 
@@ -40,7 +40,7 @@ class ZeusManager(commands.Cog, AppModule):
             return (user.nickname, user.steamid, user.is_zeus)
         return None
 
-    @sessioned
+    @asessioned
     def toggleZeusUser(self, session, steamid):
         user = self.getZeusUserBySteamID(session, steamid)
 
@@ -54,7 +54,7 @@ class ZeusManager(commands.Cog, AppModule):
     @commands.hybrid_group(fallback="list")
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
     async def zeus(self, ctx: commands.Context):
-        users = self.getAllZeusUsers()
+        users = await self.getAllZeusUsers()
 
         users_str = '\n'.join(f"[{user.steamid}] {user.nickname:20}: {'ZEUS' if user.is_zeus else 'NOT ZEUS'}" for user in users)
         await self.send(ctx, f"List of Zeus users ```{users_str}```")
@@ -63,7 +63,7 @@ class ZeusManager(commands.Cog, AppModule):
     @zeus.command(name="add")
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
     async def zeus_add(self, ctx: commands.Context, nickname: str, steamid: str):
-        user = self.addZeusUser(nickname, steamid)
+        user = await self.addZeusUser(nickname, steamid)
         if user:
             nickname, steamid, is_zeus = user
             await self.send(ctx, f"Added new Zeus user [{steamid}] {nickname}")
@@ -73,7 +73,7 @@ class ZeusManager(commands.Cog, AppModule):
     @zeus.command(name="del")
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
     async def zeus_del(self, ctx: commands.Context, steamid: str):
-        user = self.delZeusUser(steamid)
+        user = await self.delZeusUser(steamid)
         if user:
             nickname, steamid, is_zeus = user
             await self.send(ctx, f"Removed Zeus user [{steamid}] {nickname}")
@@ -83,7 +83,7 @@ class ZeusManager(commands.Cog, AppModule):
     @zeus.command(name="toggle")
     @PrivSystem.withPriv(PrivSystemLevels.OWNER)
     async def zeus_toggle(self, ctx: commands.Context, steamid: str):
-        user = self.toggleZeusUser(steamid)
+        user = await self.toggleZeusUser(steamid)
         if user:
             nickname, steamid, is_zeus = user
             await self.send(ctx, f"[{steamid}] {nickname} toggled to {'ZEUS' if is_zeus else 'NOT ZEUS'}")
@@ -1,6 +1,7 @@
 from .utils import mutexed
 from .utils import semaphored
 from .utils import sessioned
+from .utils import asessioned
 from .utils import threaded
 from .utils import to_thread
 from .utils import to_task
@@ -11,5 +12,20 @@ from .exceptons import BotInternalException
 
 from .pbo_manipulator import PBOManipulator
 
+from .cache import TTLCache
+from .file_manifest import FileManifest
+from .lowercase import LowercaseNormaliser
+
+from .worker import JobWorker
+from .worker import report_progress
+
+from .workshop import WorkshopClient
+from .workshop import WorkshopItem
+
+from .downloader import DownloadHandle
+from .downloader import download
+from .downloader import download_attachment
+
 from .log import Log
-from .log import LogLevel
\ No newline at end of file
+from .log import LogLevel
+from .log import configure_logging
\ No newline at end of file
@@ -0,0 +1,65 @@
+import time
+
+from collections import OrderedDict
+
+_MISSING = object()
+
+class TTLCache:
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__data = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.__data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key, default=None, count=True):
+        entry = self.__data.get(key)
+
+        if entry is not None:
+            value, expires = entry
+            if expires > time.monotonic():
+                self.__data.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return value
+
+            del self.__data[key]
+
+        if count:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self.__data[key] = (value, time.monotonic() + self.ttl)
+        self.__data.move_to_end(key)
+
+        while len(self.__data) > self.maxsize:
+            self.__data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key):
+        self.__data.pop(key, None)
+
+    def clear(self):
+        self.__data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size":         len(self.__data),
+            "maxsize":      self.maxsize,
+            "ttl":          self.ttl,
+            "hits":         self.hits,
+            "misses":       self.misses,
+            "evictions":    self.evictions,
+            "hit_rate":     f"{(self.hits / total * 100) if total else 0:.1f}%",
+        }
@@ -0,0 +1,106 @@
+import os
+import io
+import shutil
+import asyncio
+import hashlib
+import tempfile
+
+import aiohttp
+
+from .exceptons import BotInternalException
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# No size limit unless max_attachment_size is set
+DOWNLOAD_MAX_SIZE   = None
+
+class DownloadHandle:
+
+    def __init__(self, filename, path=None, buffer=None, size=0, sha256=None):
+        self.filename = filename
+        self.path = path
+        self.buffer = buffer
+        self.size = size
+        self.sha256 = sha256
+
+    @property
+    def in_memory(self):
+        return self.buffer is not None
+
+    def read(self):
+        if self.in_memory:
+            return self.buffer.getvalue()
+
+        with open(self.path, 'rb') as file:
+            return file.read()
+
+    def text(self, encoding="utf8"):
+        return self.read().decode(encoding, errors="replace")
+
+    async def save(self, destination):
+        def _save():
+            os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+
+            if self.in_memory:
+                with open(destination, 'wb') as file:
+                    file.write(self.buffer.getvalue())
+            else:
+                shutil.move(self.path, destination)
+                self.path = destination
+
+        await asyncio.to_thread(_save)
+
+    def cleanup(self):
+        if self.path and os.path.exists(self.path) and self.path.startswith(tempfile.gettempdir()):
+            os.remove(self.path)
+        self.buffer = None
+
+async def download(url, filename, max_size=DOWNLOAD_MAX_SIZE, to_memory=False, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    digest = hashlib.sha256()
+    size = 0
+
+    if to_memory:
+        target = io.BytesIO()
+        path = None
+    else:
+        fd, path = await asyncio.to_thread(tempfile.mkstemp, suffix=f"_{os.path.basename(filename)}")
+        target = os.fdopen(fd, 'wb')
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    raise BotInternalException(f"Failed to download {filename}: HTTP {response.status}")
+
+                if max_size and response.content_length and response.content_length > max_size:
+                    raise BotInternalException(f"File {filename} is too big ({response.content_length} > {max_size} bytes)")
+
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    size += len(chunk)
+                    if max_size and size > max_size:
+                        raise BotInternalException(f"File {filename} is too big (more than {max_size} bytes)")
+
+                    digest.update(chunk)
+
+                    if to_memory:
+                        target.write(chunk)
+                    else:
+                        await asyncio.to_thread(target.write, chunk)
+    except BaseException:
+        if not to_memory:
+            target.close()
+            os.remove(path)
+        raise
+
+    if not to_memory:
+        target.close()
+        return DownloadHandle(filename, path=path, size=size, sha256=digest.hexdigest())
+
+    return DownloadHandle(filename, buffer=target, size=size, sha256=digest.hexdigest())
+
+async def download_attachment(attachment, max_size=None, to_memory=False):
+    max_size = max_size if max_size else DOWNLOAD_MAX_SIZE
+
+    if max_size and attachment.size > max_size:
+        raise BotInternalException(f"Attachment {attachment.filename} is too big ({attachment.size} > {max_size} bytes)")
+
+    return await download(attachment.url, attachment.filename, max_size, to_memory)
@@ -0,0 +1,76 @@
+import os
+import json
+import time
+
+class FileManifest:
+
+    def __init__(self, manifest_dir):
+        self.manifest_dir = manifest_dir
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.manifest_dir, f"{key}.json")
+
+    def build(self, root):
+        files = {}
+
+        for current, dirs, names in os.walk(root):
+            for name in names:
+                full_path = os.path.join(current, name)
+                stat = os.stat(full_path, follow_symlinks=False)
+                files[os.path.relpath(full_path, root)] = [stat.st_size, stat.st_mtime_ns]
+
+        return files
+
+    def load(self, key):
+        try:
+            with open(self.path(key), 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, key, root, validated_at=None):
+        manifest = {
+            "validated_at": validated_at if validated_at else int(time.time()),
+            "files": self.build(root),
+        }
+
+        tmp_path = f"{self.path(key)}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(manifest, file)
+        os.replace(tmp_path, self.path(key))
+
+        return manifest
+
+    def remove(self, key):
+        if os.path.exists(self.path(key)):
+            os.remove(self.path(key))
+
+    def validated_at(self, key):
+        manifest = self.load(key)
+        return manifest["validated_at"] if manifest else 0
+
+    def verify(self, key, root):
+        manifest = self.load(key)
+        if manifest is None:
+            return None, "no manifest"
+
+        if not os.path.isdir(root):
+            return False, "directory is missing"
+
+        expected = manifest["files"]
+        actual = self.build(root)
+
+        missing = expected.keys() - actual.keys()
+        if missing:
+            return False, f"{len(missing)} files missing"
+
+        extra = actual.keys() - expected.keys()
+        if extra:
+            return False, f"{len(extra)} unexpected files"
+
+        changed = [name for name, entry in expected.items() if actual[name] != entry]
+        if changed:
+            return False, f"{len(changed)} files changed"
+
+        return True, "ok"
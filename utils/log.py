@@ -1,18 +1,123 @@
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
 import datetime as dt
 
 from enum import Enum, auto
 
 class LogLevel(Enum):
+    DEBUG       = auto()
     INFO        = auto()
     WARN        = auto()
     ERR         = auto()
     FATAL       = auto()
 
+LOGGING_LEVELS = {
+    LogLevel.DEBUG: logging.DEBUG,
+    LogLevel.INFO:  logging.INFO,
+    LogLevel.WARN:  logging.WARNING,
+    LogLevel.ERR:   logging.ERROR,
+    LogLevel.FATAL: logging.CRITICAL,
+}
+
+class TextFormatter(logging.Formatter):
+
+    def format(self, record):
+        now_string = dt.datetime.fromtimestamp(record.created).strftime("%d-%m-%Y %H:%M:%S")
+        return f"[{now_string}][{record.module_name:>20s}][{record.level_name}]: {record.getMessage()}"
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        return json.dumps({
+            "time":     dt.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "module":   record.module_name,
+            "level":    record.level_name,
+            "message":  record.getMessage(),
+        }, ensure_ascii=False)
+
+class LogConfig:
+
+    def __init__(self):
+        self.level = LogLevel.INFO
+        self.module_levels = {}
+
+        self.logger = logging.getLogger("arma3dsbot")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+
+        self.queue = queue.SimpleQueue()
+        self.listener = None
+
+        self.logger.addHandler(logging.handlers.QueueHandler(self.queue))
+        self.start([self.__console_handler(False)])
+
+    def __console_handler(self, as_json):
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter() if as_json else TextFormatter())
+        return handler
+
+    def start(self, handlers):
+        self.stop()
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers)
+        self.listener.start()
+
+    def stop(self):
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+    def __configure_levels(self, settings: dict):
+        self.level = LogLevel[settings.get("level", "INFO")]
+        self.module_levels = {module: LogLevel[level] for module, level in settings.get("modules", {}).items()}
+
+    def configure(self, settings: dict):
+        self.__configure_levels(settings)
+
+        as_json = settings.get("json", False)
+        handlers = [self.__console_handler(as_json)]
+
+        if settings.get("file"):
+            file_handler = logging.handlers.RotatingFileHandler(settings["file"],
+                                                                maxBytes=settings.get("max_bytes", 10 * 1024 * 1024),
+                                                                backupCount=settings.get("backup_count", 5),
+                                                                encoding="utf8")
+            file_handler.setFormatter(JsonFormatter() if as_json else TextFormatter())
+            handlers.append(file_handler)
+
+        self.start(handlers)
+
+    def forward(self, settings: dict, target):
+        # Records are filtered here and written by the handlers of the process owning target
+        self.__configure_levels(settings)
+        self.start([logging.handlers.QueueHandler(target)])
+
+    def enabled(self, module_name, level: LogLevel):
+        return level.value >= self.module_levels.get(module_name, self.level).value
+
+_config = LogConfig()
+atexit.register(_config.stop)
+
+def configure_logging(settings: dict):
+    _config.configure(settings)
+
+def forward_logging(settings: dict, target):
+    _config.forward(settings, target)
+
+def handle_record(record: logging.LogRecord):
+    _config.logger.handle(record)
 
 class Log:
 
+    def logEnabled(self, level: LogLevel):
+        return _config.enabled(self.__class__.__name__, level)
+
     def log(self, message, level: LogLevel = LogLevel.INFO):
-        now = dt.datetime.now()
-        now_string = now.strftime("%d-%m-%Y %H:%M:%S")
+        module_name = self.__class__.__name__
+        if not _config.enabled(module_name, level):
+            return
 
-        print(f"[{now_string}][{self.__class__.__name__:>20s}][{level.name}]: {message}")
\ No newline at end of file
+        _config.logger.log(LOGGING_LEVELS[level], message, extra={"module_name": module_name, "level_name": level.name})
@@ -0,0 +1,58 @@
+import os
+
+from .log import Log, LogLevel
+
+class LowercaseNormaliser(Log):
+
+    def normalise(self, root):
+        renamed = 0
+        conflicts = 0
+
+        if not os.path.isdir(root):
+            return renamed, conflicts
+
+        # Bottom-up, so a directory is only renamed after everything below it
+        for current, dirs, files in os.walk(root, topdown=False):
+            for name in files + dirs:
+                lower = name.lower()
+                if name == lower:
+                    continue
+
+                old_path = os.path.join(current, name)
+                new_path = os.path.join(current, lower)
+
+                failed = self.__replace(old_path, new_path, root)
+                if failed:
+                    conflicts += failed
+                    continue
+
+                renamed += 1
+
+                if self.logEnabled(LogLevel.DEBUG):
+                    self.log(f"Renamed: {os.path.relpath(old_path, root)} -> {lower}", LogLevel.DEBUG)
+
+        return renamed, conflicts
+
+    def __replace(self, old_path, new_path, root):
+        # steamcmd writes updated files under their original case next to the older
+        # lowercase copy, so the mixed-case entry always wins a clash
+        if self.__is_dir(old_path) and self.__is_dir(new_path):
+            failed = 0
+            for name in os.listdir(old_path):
+                failed += self.__replace(os.path.join(old_path, name), os.path.join(new_path, name), root)
+
+            if not failed:
+                os.rmdir(old_path)
+            return failed
+
+        try:
+            os.replace(old_path, new_path)
+        except OSError as e:
+            self.log(f"Can't move {os.path.relpath(old_path, root)} to {os.path.relpath(new_path, root)}: {e}", LogLevel.WARN)
+            return 1
+
+        return 0
+
+    @staticmethod
+    def __is_dir(path):
+        return os.path.isdir(path) and not os.path.islink(path)
@@ -14,7 +14,7 @@ class PBOManipulator(Log):
         self.header = "IIIII"
         self.header_size = struct.calcsize(self.header)
 
-        self.log(f"Header struct: {self.header} Header size: {self.header_size}")
+        self.log(f"Header struct: {self.header} Header size: {self.header_size}", LogLevel.DEBUG)
 
         self.files = []
 
@@ -23,7 +23,8 @@ class PBOManipulator(Log):
             self.readHeader(file)
 
             for f in self.files:
-                self.log(f"Reading file: {f['name'].replace(self.dir, '')}, Size: {f['datasize']}")
+                if self.logEnabled(LogLevel.DEBUG):
+                    self.log(f"Reading file: {f['name'].replace(self.dir, '')}, Size: {f['datasize']}", LogLevel.DEBUG)
                 f['data'] = file.read(f['datasize'])
 
                 splited_path = f['name'].split("/")
@@ -43,7 +44,7 @@ class PBOManipulator(Log):
                     break
                 checksum.append(int.from_bytes(c, 'big'))
                 
-            self.log(f"{checksum}")
+            self.log(f"{checksum}", LogLevel.DEBUG)
 
     def _recursive_update(self, dir, _dir=None):
         directory = Path(_dir if _dir else dir)
@@ -53,7 +54,8 @@ class PBOManipulator(Log):
             if item.is_file():
                 size = os.path.getsize(item)
                 timestamp = os.path.getctime(item)
-                self.log(f"Updating -> File: {path}, Size {size}, Timestamp {int(timestamp)}")
+                if self.logEnabled(LogLevel.DEBUG):
+                    self.log(f"Updating -> File: {path}, Size {size}, Timestamp {int(timestamp)}", LogLevel.DEBUG)
                 with open(item, 'rb') as file:
                     self.files.append({ 
                         "name": path,
@@ -80,7 +82,8 @@ class PBOManipulator(Log):
         with open(f"{self.basedir}/{self.filename}", 'wb') as file:
             self.writeHeader(file)
             for f in self.files:
-                self.log(f"Writing file: {f['name']}, Size: {f['datasize']}")
+                if self.logEnabled(LogLevel.DEBUG):
+                    self.log(f"Writing file: {f['name']}, Size: {f['datasize']}", LogLevel.DEBUG)
                 file.write(f['data'])
 
     def readString(self, file):
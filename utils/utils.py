@@ -28,6 +28,20 @@ def sessioned(func):
             return output
     return wrapper
 
+def asessioned(func):
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        db = self.db if isinstance(self.db, Database) else self
+
+        def call():
+            with db.Session() as session:
+                output = func(self, session, *args, **kwargs)
+                session.close()
+                return output
+
+        return await db.run(call)
+    return wrapper
+
 def threaded(func):
     def wrapper(*args, **kwargs):
         t = threading.Thread(target=func, args=args, kwargs=kwargs)
@@ -0,0 +1,151 @@
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .log import Log, LogLevel, forward_logging, handle_record
+
+EVENT_DRAIN_TIMEOUT = 5
+
+# Set in every worker process by the pool initializer
+_events = None
+_current_job = None
+
+def _init_worker(events, log_settings):
+    global _events
+    _events = events
+    # Log records travel with the job events and are written by the parent
+    forward_logging(log_settings, events)
+
+def _run_job(job_id, func, args, kwargs):
+    global _current_job
+    _current_job = job_id
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Results come back through the pool, this marks the end of the job's event stream
+        _events.put((job_id, time.time(), None, {}))
+        _current_job = None
+
+def report_progress(message, **data):
+    if _events is None or _current_job is None:
+        return
+    _events.put((_current_job, time.time(), message, data))
+
+class WorkerJob:
+    __slots__ = ("id", "name", "started_at", "last_event", "progress", "finished")
+
+    def __init__(self, job_id, name, progress=None):
+        self.id = job_id
+        self.name = name
+        self.started_at = time.time()
+        self.last_event = None
+        self.progress = progress
+        self.finished = asyncio.Event()
+
+class JobWorker(Log):
+
+    def __init__(self, processes=2, log_settings=None):
+        self.processes = processes
+        self.log_settings = log_settings if log_settings else {}
+
+        self.__context = multiprocessing.get_context("spawn")
+        self.__executor = None
+        self.__events = None
+        self.__listener = None
+        self.__loop = None
+        self.__jobs = {}
+        self.__next_id = 0
+
+        self.submitted = 0
+        self.failed = 0
+
+    def __start(self):
+        if self.__executor is not None:
+            return
+
+        self.__loop = asyncio.get_running_loop()
+        self.__events = self.__context.Queue()
+        self.__executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=self.__context,
+                                              initializer=_init_worker, initargs=(self.__events, self.log_settings))
+
+        self.__listener = threading.Thread(target=self.__listen, name="JobWorkerEvents", daemon=True)
+        self.__listener.start()
+        self.log(f"Started job worker with {self.processes} processes")
+
+    def __listen(self):
+        while True:
+            event = self.__events.get()
+            if event is None:
+                break
+
+            if isinstance(event, logging.LogRecord):
+                handle_record(event)
+                continue
+
+            try:
+                self.__loop.call_soon_threadsafe(self.__dispatch, *event)
+            except RuntimeError:
+                # The bot has shut down and closed its loop, late events are dropped
+                pass
+
+    def __dispatch(self, job_id, timestamp, message, data):
+        job = self.__jobs.get(job_id)
+        if job is None:
+            return
+
+        if message is None:
+            job.finished.set()
+            return
+
+        job.last_event = message
+        self.log(f"Job {job.id} ({job.name}): {message}", LogLevel.DEBUG)
+
+        if job.progress:
+            try:
+                job.progress(message, data)
+            except Exception as e:
+                self.log(f"Progress handler of job {job.id} failed: {e}", LogLevel.WARN)
+
+    async def submit(self, func, *args, progress=None, **kwargs):
+        self.__start()
+
+        self.__next_id += 1
+        job = WorkerJob(self.__next_id, func.__name__, progress)
+        self.__jobs[job.id] = job
+        self.submitted += 1
+
+        try:
+            return await self.__loop.run_in_executor(self.__executor, _run_job, job.id, func, args, kwargs)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            try:
+                await asyncio.wait_for(job.finished.wait(), EVENT_DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.log(f"Job {job.id} ({job.name}) finished without closing its event stream", LogLevel.WARN)
+            del self.__jobs[job.id]
+
+    def jobs(self):
+        return list(self.__jobs.values())
+
+    def stats(self):
+        return {
+            "processes":    self.processes,
+            "running":      len(self.__jobs),
+            "submitted":    self.submitted,
+            "failed":       self.failed,
+        }
+
+    def close(self):
+        if self.__executor is None:
+            return
+
+        self.__executor.shutdown(wait=True, cancel_futures=True)
+        self.__events.put(None)
+        self.__listener.join()
+        self.__executor = None
@@ -0,0 +1,108 @@
+import re
+import asyncio
+
+import aiohttp
+
+from .log import Log, LogLevel
+
+WORKSHOP_DETAILS_URL = "https://api.steampowered.com/ISteamRemoteStorage/GetPublishedFileDetails/v1/"
+WORKSHOP_CHANGELOG_URL = "https://steamcommunity.com/sharedfiles/filedetails/changelog"
+
+UPDATE_PATTERN = re.compile(r"workshopAnnouncement.*?<p id=\"(\d+)\">", re.DOTALL)
+
+class WorkshopItem:
+    __slots__ = ("id", "time_updated", "file_size", "manifest_id", "title", "source")
+
+    def __init__(self, mod_id, time_updated=None, file_size=None, manifest_id=None, title=None, source="api"):
+        self.id = mod_id
+        self.time_updated = time_updated
+        self.file_size = file_size
+        self.manifest_id = manifest_id
+        self.title = title
+        self.source = source
+
+class WorkshopClient(Log):
+
+    def __init__(self, details_url=WORKSHOP_DETAILS_URL, changelog_url=WORKSHOP_CHANGELOG_URL, batch_size=100, concurrency=4, timeout=30):
+        self.details_url = details_url
+        self.changelog_url = changelog_url
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+        self.__session = None
+        self.__semaphore = asyncio.Semaphore(concurrency)
+
+    @property
+    def session(self):
+        if self.__session is None or self.__session.closed:
+            self.__session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency),
+                                                   timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.__session
+
+    async def close(self):
+        if self.__session and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
+
+    async def __fetch_batch(self, mod_ids):
+        data = {"itemcount": len(mod_ids)}
+        for i, mod_id in enumerate(mod_ids):
+            data[f"publishedfileids[{i}]"] = mod_id
+
+        async with self.__semaphore:
+            async with self.session.post(self.details_url, data=data) as response:
+                response.raise_for_status()
+                payload = await response.json(content_type=None)
+
+        items = {}
+        for details in payload.get("response", {}).get("publishedfiledetails", []):
+            # result 1 is k_EResultOK, anything else means the item is hidden or removed
+            if details.get("result") != 1 or "time_updated" not in details:
+                continue
+
+            mod_id = str(details["publishedfileid"])
+            items[mod_id] = WorkshopItem(mod_id,
+                                         int(details["time_updated"]),
+                                         int(details["file_size"]) if "file_size" in details else None,
+                                         details.get("hcontent_file"),
+                                         details.get("title"))
+        return items
+
+    async def __scrape(self, mod_id):
+        async with self.__semaphore:
+            async with self.session.get(f"{self.changelog_url}/{mod_id}") as response:
+                response.raise_for_status()
+                html = await response.text()
+
+        match = UPDATE_PATTERN.search(html)
+        if not match:
+            return None
+
+        return WorkshopItem(mod_id, int(match.group(1)), source="changelog")
+
+    async def get_details(self, mod_ids):
+        mod_ids = [str(mod_id) for mod_id in mod_ids]
+        batches = [mod_ids[i:i + self.batch_size] for i in range(0, len(mod_ids), self.batch_size)]
+
+        items = {}
+        results = await asyncio.gather(*[self.__fetch_batch(batch) for batch in batches], return_exceptions=True)
+
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                self.log(f"Workshop details request for {len(batch)} items failed: {result!r}", LogLevel.WARN)
+                continue
+            items.update(result)
+
+        missing = [mod_id for mod_id in mod_ids if mod_id not in items]
+        if missing:
+            self.log(f"Falling back to changelog pages for {len(missing)} items", LogLevel.WARN)
+
+            results = await asyncio.gather(*[self.__scrape(mod_id) for mod_id in missing], return_exceptions=True)
+            for mod_id, result in zip(missing, results):
+                if isinstance(result, Exception):
+                    self.log(f"Failed to fetch changelog for {mod_id}: {result!r}", LogLevel.WARN)
+                elif result:
+                    items[mod_id] = result
+
+        return items